@@ -0,0 +1,227 @@
+"""
+Bulk user import for onboarding a whole hospital at once.
+
+Usable from the admin API (POST /auth/bulk-import) or from the command line:
+
+    python -m app.auth.bulk_import users.csv [--format ndjson] [--report report.json]
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.auth.hashing_pool import password_hasher
+from app.database.models import User
+from app.schemas.auth import SignupRequest
+
+load_dotenv()
+
+logger = logging.getLogger("my_app")
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+_LOOKUP_CHUNK_SIZE = 500
+
+
+# ---------------- Parsing ----------------
+def parse_rows(content: bytes | str, fmt: str) -> list[dict]:
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if fmt == "csv":
+        return [dict(row) for row in csv.DictReader(io.StringIO(content))]
+
+    if fmt == "ndjson":
+        rows = []
+        for line in content.splitlines():
+            line = line.strip()
+            if line:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = {"_parse_error": "Invalid JSON line"}
+                if not isinstance(row, dict):
+                    row = {"_parse_error": "Line is not a JSON object"}
+                rows.append(row)
+        return rows
+
+    raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def detect_format(filename: str | None, declared: str | None = None) -> str:
+    if declared:
+        return declared.lower()
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+# ---------------- Set-based uniqueness ----------------
+def _existing_values(db: Session, column, values: list[str]) -> set[str]:
+    found = set()
+    for i in range(0, len(values), _LOOKUP_CHUNK_SIZE):
+        chunk = values[i:i + _LOOKUP_CHUNK_SIZE]
+        found.update(db.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+
+# ---------------- Import ----------------
+def import_users(
+    db: Session,
+    rows: list[dict],
+    batch_size: int = BULK_IMPORT_BATCH_SIZE,
+) -> dict:
+    """
+    Validates, hashes and inserts ``rows``. Each row gets an entry in the
+    returned report; one bad row never blocks the rest of the file.
+    """
+    started = time.perf_counter()
+    results = [{"row": i + 1, "status": "pending"} for i in range(len(rows))]
+    candidates = []  # (index, SignupRequest)
+    seen_usernames, seen_emails = set(), set()
+
+    for i, raw in enumerate(rows):
+        if "_parse_error" in raw:
+            results[i].update(status="error", error=raw["_parse_error"])
+            continue
+
+        # CSV gives "" for empty optional cells
+        raw = {key: value for key, value in raw.items() if value not in ("", None)}
+        try:
+            payload = SignupRequest(**raw)
+        except ValidationError as exc:
+            results[i].update(
+                status="error",
+                username=raw.get("username"),
+                error="; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors()
+                ),
+            )
+            continue
+
+        results[i]["username"] = payload.username
+        if payload.username in seen_usernames:
+            results[i].update(status="error", error="Duplicate username in file")
+            continue
+        if payload.email in seen_emails:
+            results[i].update(status="error", error="Duplicate email in file")
+            continue
+
+        seen_usernames.add(payload.username)
+        seen_emails.add(payload.email)
+        candidates.append((i, payload))
+
+    taken_usernames = _existing_values(db, User.username, [p.username for _, p in candidates])
+    taken_emails = _existing_values(db, User.email, [p.email for _, p in candidates])
+
+    accepted = []
+    for i, payload in candidates:
+        if payload.username in taken_usernames:
+            results[i].update(status="error", error="Username already exists")
+        elif payload.email in taken_emails:
+            results[i].update(status="error", error="Email already exists")
+        else:
+            accepted.append((i, payload))
+
+    # bcrypt dominates the cost; it shares the login pool and its admission
+    # limit, so an import cannot take over every core
+    hashes = password_hasher.hash_many([payload.password for _, payload in accepted])
+
+    for start in range(0, len(accepted), batch_size):
+        batch = accepted[start:start + batch_size]
+        values = [
+            {
+                "username": payload.username,
+                "email": payload.email,
+                "phone": payload.phone,
+                "role": payload.role,
+                "password_hash": password_hash,
+            }
+            for (_, payload), password_hash in zip(batch, hashes[start:start + batch_size])
+        ]
+        _insert_batch(db, batch, values, results)
+
+    created = sum(1 for r in results if r["status"] == "created")
+    elapsed = time.perf_counter() - started
+    logger.info(f"Bulk import finished: {created}/{len(rows)} users created in {elapsed:.1f}s")
+
+    return {
+        "total": len(rows),
+        "created": created,
+        "failed": len(rows) - created,
+        "elapsed_seconds": round(elapsed, 3),
+        "results": results,
+    }
+
+
+def _insert_batch(db: Session, batch, values, results):
+    try:
+        inserted = db.execute(
+            insert(User).returning(User.id, User.username), values
+        ).all()
+        db.commit()
+    except IntegrityError:
+        # A concurrent signup claimed a name after our uniqueness check;
+        # fall back to row-by-row so only the conflicting rows fail.
+        db.rollback()
+        for (i, _), row in zip(batch, values):
+            try:
+                user_id = db.execute(insert(User).returning(User.id), row).scalar_one()
+                db.commit()
+                results[i].update(status="created", id=user_id)
+            except IntegrityError:
+                db.rollback()
+                results[i].update(status="error", error="Username or email already exists")
+        return
+
+    ids = {username: user_id for user_id, username in inserted}
+    for i, payload in batch:
+        results[i].update(status="created", id=ids.get(payload.username))
+
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    from app.database.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    parser.add_argument("--report", help="write the per-row report to this JSON file")
+    args = parser.parse_args(argv)
+
+    with open(args.path, "rb") as f:
+        rows = parse_rows(f.read(), detect_format(args.path, args.format))
+
+    db = SessionLocal()
+    try:
+        report = import_users(db, rows, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(
+        f"{report['created']} created, {report['failed']} failed "
+        f"of {report['total']} rows in {report['elapsed_seconds']}s"
+    )
+    for result in report["results"]:
+        if result["status"] == "error":
+            print(f"  row {result['row']}: {result['error']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.auth.utils import (
+    BCRYPT_ROUNDS,
+    timed_hash_password,
+    timed_verify_and_update_password,
+)
+
+load_dotenv()
+
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4))
+)
+PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", "2"))
+
+
+class _LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so password work never occupies
+    more than ``max_pending`` request threads. Once that many jobs are
+    queued or running, new requests fail fast with 503 + Retry-After.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.hash_latency = _LatencyStats()
+        self.queue_wait = _LatencyStats()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        with self._stats_lock:
+            self.pending += 1
+        try:
+            submitted_at = time.time()
+            result, started_at, finished_at = self._get_executor().submit(fn, *args).result()
+        finally:
+            with self._stats_lock:
+                self.pending -= 1
+            self._slots.release()
+
+        with self._stats_lock:
+            self.queue_wait.observe(started_at - submitted_at)
+            self.hash_latency.observe(finished_at - started_at)
+        return result
+
+    def hash_password(self, plain_password: str) -> str:
+        return self._run(timed_hash_password, plain_password)
+
+    def hash_many(self, plain_passwords: list[str]) -> list[str]:
+        """
+        Hashes a whole batch (bulk import) on the shared pool. The batch keeps
+        at most ``workers`` jobs in flight and waits for admission slots
+        instead of failing, so interactive logins keep the remaining slots.
+        """
+        window = max(1, min(self.workers, self.max_pending))
+        in_flight = deque()
+        hashes = []
+        try:
+            for password in plain_passwords:
+                if len(in_flight) >= window:
+                    hashes.append(self._collect(in_flight.popleft()))
+                self._slots.acquire()
+                with self._stats_lock:
+                    self.pending += 1
+                submitted_at = time.time()
+                try:
+                    future = self._get_executor().submit(timed_hash_password, password)
+                except BaseException:
+                    # Not in in_flight yet, so the finally below would miss it
+                    self._release()
+                    raise
+                in_flight.append((submitted_at, future))
+            while in_flight:
+                hashes.append(self._collect(in_flight.popleft()))
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+                self._release()
+        return hashes
+
+    def _collect(self, job) -> str:
+        submitted_at, future = job
+        try:
+            result, started_at, finished_at = future.result()
+        finally:
+            self._release()
+        with self._stats_lock:
+            self.queue_wait.observe(started_at - submitted_at)
+            self.hash_latency.observe(finished_at - started_at)
+        return result
+
+    def _release(self):
+        with self._stats_lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def verify_and_update(self, plain_password: str, hashed_password: str):
+        """Returns (is_valid, new_hash); see utils.verify_and_update_password."""
+        is_valid, new_hash = self._run(
+            timed_verify_and_update_password, plain_password, hashed_password
+        )
+        if new_hash:
+            with self._stats_lock:
+                self.rehashed += 1
+        return is_valid, new_hash
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "hash_latency": self.hash_latency.as_dict(),
+                "queue_wait": self.queue_wait.as_dict(),
+            }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    retry_after=PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
@@ -2,14 +2,22 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 
 import os
+import uuid
 from dotenv import load_dotenv
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.database.session import get_db
+from app.database.async_session import get_async_db
 from app.database.models import User
+from app.auth.principal_cache import principal_cache
+from app.auth.token_cache import token_cache, token_digest
+from app.auth.revocation import revocation_store
 
 # =======================
 # ENV & JWT CONFIG
@@ -36,7 +44,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -45,34 +53,117 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     expire = datetime.utcnow() + (
         expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     )
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_token(token: str, expected_type: str = "access"):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != expected_type:
+def _decode_token(token: str, expected_type: str):
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
             return None
-        return payload
-    except JWTError:
+        token_cache.put(digest, payload)
+
+    if payload.get("type") != expected_type:
+        return None
+    return payload
+
+
+def verify_token(token: str, expected_type: str = "access"):
+    payload = _decode_token(token, expected_type)
+    if payload is None:
+        return None
+
+    # Checked on every call, cached or not, so logout/rotation apply at once.
+    # Refresh tokens skip the per-worker filter: another worker may have
+    # rotated this one since our last sweep.
+    if revocation_store.is_revoked(payload.get("jti"), authoritative=expected_type == "refresh"):
+        return None
+    return payload
+
+
+async def verify_token_async(token: str, expected_type: str = "access"):
+    """
+    verify_token for the event loop. The filter answers most tokens in
+    memory; a filter positive (or the first check, which loads the filter)
+    needs the database and goes to the threadpool.
+    """
+    payload = _decode_token(token, expected_type)
+    if payload is None:
         return None
 
+    jti = payload.get("jti")
+    authoritative = expected_type == "refresh"
+    if authoritative or revocation_store.maybe_revoked(jti):
+        if await run_in_threadpool(revocation_store.is_revoked, jti, authoritative):
+            return None
+    return payload
+
+
+def revoke_token(token: str, payload: dict) -> bool:
+    """
+    Deny-list a verified token and drop it from the verification cache.
+    Returns False when another request revoked it first.
+    """
+    token_cache.discard(token_digest(token))
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    return revocation_store.revoke(jti, payload.get("type", "access"), payload["exp"])
+
+# =======================
+# PRINCIPAL CACHE
+# =======================
+
+def _detached_snapshot(user: User) -> User:
+    """Copy the loaded column values into a detached, session-free User."""
+    snapshot = User(**{
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def load_principal(db: Session, username: str):
+    cached = principal_cache.get(username)
+    if cached is not None:
+        # Attach a copy to this session without emitting a SELECT
+        return db.merge(cached, load=False)
+
+    generation = principal_cache.generation()
+    user = db.query(User).filter(User.username == username).first()
+    if user:
+        principal_cache.put(username, _detached_snapshot(user), generation)
+    return user
+
+async def load_principal_async(db: AsyncSession, username: str):
+    cached = principal_cache.get(username)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    generation = principal_cache.generation()
+    user = (
+        await db.execute(select(User).where(User.username == username))
+    ).scalar_one_or_none()
+    if user:
+        principal_cache.put(username, _detached_snapshot(user), generation)
+    return user
+
 # =======================
 # FASTAPI DEPENDENCY
 # =======================
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
+def _subject_from_payload(payload):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = verify_token(token, expected_type="access")
     if payload is None:
         raise credentials_exception
 
@@ -80,7 +171,32 @@ def get_current_user(
     if not username:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    return username, credentials_exception
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    username, credentials_exception = _subject_from_payload(verify_token(token, expected_type="access"))
+
+    user = load_principal(db, username)
+    if not user:
+        raise credentials_exception
+
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """get_current_user for routes running on the event loop."""
+    username, credentials_exception = _subject_from_payload(
+        await verify_token_async(token, expected_type="access")
+    )
+
+    user = await load_principal_async(db, username)
     if not user:
         raise credentials_exception
 
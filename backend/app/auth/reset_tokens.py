@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.database.session import SessionLocal
+from app.database.models import PasswordResetToken
+from app.utils.sweeper import delete_expired_in_batches
+
+load_dotenv()
+
+logger = logging.getLogger("my_app")
+
+RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("RESET_TOKEN_EXPIRE_MINUTES", "60"))
+RESET_TOKEN_SWEEP_INTERVAL_SECONDS = float(os.getenv("RESET_TOKEN_SWEEP_INTERVAL_SECONDS", "300"))
+RESET_TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("RESET_TOKEN_SWEEP_BATCH_SIZE", "500"))
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_reset_token(db: Session, user_id: int) -> str:
+    """Store a new reset token for the user, replacing any earlier one."""
+    token = secrets.token_urlsafe(32)
+
+    db.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user_id))
+    db.add(PasswordResetToken(
+        user_id=user_id,
+        token_hash=_hash_token(token),
+        expires_at=datetime.utcnow() + timedelta(minutes=RESET_TOKEN_EXPIRE_MINUTES),
+    ))
+    db.commit()
+    return token
+
+
+def find_reset_token(db: Session, token: str):
+    """Single probe of the unique token_hash index."""
+    return db.execute(
+        select(PasswordResetToken).where(PasswordResetToken.token_hash == _hash_token(token))
+    ).scalar_one_or_none()
+
+
+def consume_reset_token(db: Session, reset: PasswordResetToken) -> bool:
+    """
+    Delete the token in the caller's transaction. False when a concurrent
+    reset already consumed it, so only one request may use a token.
+    """
+    result = db.execute(
+        delete(PasswordResetToken)
+        .where(PasswordResetToken.token_hash == reset.token_hash)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def sweep_expired_reset_tokens():
+    db = SessionLocal()
+    try:
+        purged = delete_expired_in_batches(
+            db,
+            PasswordResetToken,
+            PasswordResetToken.expires_at,
+            datetime.utcnow(),
+            batch_size=RESET_TOKEN_SWEEP_BATCH_SIZE,
+        )
+    finally:
+        db.close()
+
+    if purged:
+        logger.info(f"Purged {purged} expired password reset tokens")
@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.database.session import SessionLocal
+from app.database.models import RevokedToken
+from app.utils.bloom import BloomFilter
+from app.utils.sweeper import delete_expired_in_batches
+
+load_dotenv()
+
+logger = logging.getLogger("my_app")
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_SWEEP_INTERVAL_SECONDS = float(os.getenv("REVOCATION_SWEEP_INTERVAL_SECONDS", "60"))
+
+
+class TokenRevocationStore:
+    """
+    Revoked token ids (``jti``) persisted in ``revoked_tokens`` and mirrored
+    into an in-memory Bloom filter.
+
+    The common case - a token that was never revoked - is answered by the
+    filter alone with no database access. Only filter positives (real
+    revocations plus a small false-positive rate) probe the unique jti index.
+
+    Revocations made by other worker processes reach this worker's filter on
+    the next sweep, i.e. within REVOCATION_SWEEP_INTERVAL_SECONDS. Checks
+    that cannot tolerate that window (refresh-token rotation) pass
+    ``authoritative=True`` and always probe the database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = None
+        self._lock = threading.Lock()
+        # jtis revoked locally since the last rebuild; replayed into the new
+        # filter so a revocation racing a sweep is never lost
+        self._since_rebuild = set()
+        self.filter_negatives = 0
+        self.db_probes = 0
+
+    def _build_filter(self, db) -> BloomFilter:
+        now = datetime.utcnow()
+        jtis = db.execute(
+            select(RevokedToken.jti).where(RevokedToken.expires_at >= now)
+        ).scalars().all()
+
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def _get_filter(self) -> BloomFilter:
+        if self._bloom is None:
+            with self._lock:
+                if self._bloom is None:
+                    db = SessionLocal()
+                    try:
+                        self._bloom = self._build_filter(db)
+                    finally:
+                        db.close()
+        return self._bloom
+
+    def revoke(self, jti: str, token_type: str, expires_at: float) -> bool:
+        """
+        Deny-lists ``jti``. Returns False when it was already revoked: the
+        unique jti index decides, so of two concurrent revocations of the
+        same token exactly one gets True.
+        """
+        db = SessionLocal()
+        try:
+            db.add(RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                expires_at=datetime.utcfromtimestamp(expires_at),
+            ))
+            db.commit()
+            claimed = True
+        except IntegrityError:
+            db.rollback()  # already revoked
+            claimed = False
+        finally:
+            db.close()
+
+        self._get_filter()
+        with self._lock:
+            self._bloom.add(jti)
+            self._since_rebuild.add(jti)
+        return claimed
+
+    def maybe_revoked(self, jti: str | None) -> bool:
+        """
+        Non-blocking pre-check for the event loop: False only when the
+        loaded filter already rules ``jti`` out. True means is_revoked()
+        must decide, which may touch the database.
+        """
+        if not jti:
+            return False
+        bloom = self._bloom
+        if bloom is None or bloom.might_contain(jti):
+            return True
+        self.filter_negatives += 1
+        return False
+
+    def is_revoked(self, jti: str | None, authoritative: bool = False) -> bool:
+        if not jti:
+            return False
+
+        if not authoritative and not self._get_filter().might_contain(jti):
+            self.filter_negatives += 1
+            return False
+
+        self.db_probes += 1
+        db = SessionLocal()
+        try:
+            return db.execute(
+                select(RevokedToken.id).where(RevokedToken.jti == jti)
+            ).first() is not None
+        finally:
+            db.close()
+
+    def sweep(self):
+        """Purge expired rows and rebuild the filter from what is left."""
+        db = SessionLocal()
+        try:
+            purged = delete_expired_in_batches(
+                db, RevokedToken, RevokedToken.expires_at, datetime.utcnow()
+            )
+            bloom = self._build_filter(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            for jti in self._since_rebuild:
+                bloom.add(jti)
+            self._since_rebuild.clear()
+            self._bloom = bloom
+        if purged:
+            logger.info(f"Purged {purged} expired revoked tokens")
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "filter_entries": bloom.count if bloom else 0,
+            "filter_capacity": bloom.capacity if bloom else self.capacity,
+            "filter_negatives": self.filter_negatives,
+            "db_probes": self.db_probes,
+        }
+
+
+revocation_store = TokenRevocationStore(
+    capacity=REVOCATION_BLOOM_CAPACITY,
+    error_rate=REVOCATION_BLOOM_ERROR_RATE,
+)
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 from app.database.session import SessionLocal
 from app.database.models import User
-from app.auth.utils import hash_password, verify_password
-from app.schemas.auth import SignupRequest, LoginRequest, UserPublic
-from app.auth.jwt_handler import create_access_token, create_refresh_token, verify_token
+from app.auth.hashing_pool import password_hasher
+from app.schemas.auth import SignupRequest, LoginRequest, UserPublic, BulkImportReport
+from app.auth.bulk_import import detect_format, parse_rows, import_users
+from app.auth.reset_tokens import issue_reset_token, find_reset_token, consume_reset_token
+from app.auth.jwt_handler import (
+    create_access_token,
+    create_refresh_token,
+    verify_token,
+    revoke_token,
+    get_current_user,
+    load_principal,
+)
+from app.auth.principal_cache import principal_cache
+from app.auth.token_cache import token_cache
+from app.auth.revocation import revocation_store
 import logging
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -32,7 +44,7 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
         email=payload.email,
         phone=payload.phone,
         role=payload.role,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hasher.hash_password(payload.password),
     )
     db.add(user)
     db.commit()
@@ -41,13 +53,47 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
     logger.info(f"New user signed up: {user.username}")
     return user
 
+@router.post("/bulk-import", response_model=BulkImportReport)
+def bulk_import(
+    file: UploadFile = File(...),
+    format: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Create many users from a CSV or NDJSON upload (admin only)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    try:
+        rows = parse_rows(file.file.read(), detect_format(file.filename, format))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    report = import_users(db, rows)
+    logger.info(
+        f"Bulk import by {current_user.username}: "
+        f"{report['created']} created, {report['failed']} failed"
+    )
+    return report
+
 @router.post("/login")
 def login(payload: LoginRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.username == payload.username).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    if not user:
         logger.error(f"Login failed for username '{payload.username}'")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    is_valid, new_hash = password_hasher.verify_and_update(payload.password, user.password_hash)
+    if not is_valid:
+        logger.error(f"Login failed for username '{payload.username}'")
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Stored hash used an outdated bcrypt cost; upgrade it transparently
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+        logger.info(f"Password hash upgraded for user: {user.username}")
+
     access_token = create_access_token(data={"sub": user.username})
     refresh_token = create_refresh_token(data={"sub": user.username})
     logger.info(f"User logged in: {user.username}")
@@ -71,10 +117,37 @@ def refresh(token: str):
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
+    # Rotation: the presented refresh token is single-use. Claiming its jti
+    # is the gate, so a replayed or concurrent refresh gets nothing.
+    if not revoke_token(token, payload):
+        logger.warning(f"Refresh token reused for user: {payload.get('sub')}")
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
     username = payload.get("sub")
     new_access_token = create_access_token(data={"sub": username})
+    new_refresh_token = create_refresh_token(data={"sub": username})
     logger.info(f"Access token refreshed for user: {username}")
-    return {"access_token": new_access_token, "token_type": "bearer"}
+    return {
+        "access_token": new_access_token,
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer",
+    }
+
+@router.post("/logout")
+def logout(refresh_token: str | None = None, token: str = Depends(oauth2_scheme)):
+    payload = verify_token(token, expected_type="access")
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    revoke_token(token, payload)
+
+    if refresh_token:
+        refresh_payload = verify_token(refresh_token, expected_type="refresh")
+        if refresh_payload and refresh_payload.get("sub") == payload.get("sub"):
+            revoke_token(refresh_token, refresh_payload)
+
+    logger.info(f"User logged out: {payload.get('sub')}")
+    return {"message": "Logged out"}
 
 @router.get("/me", response_model=UserPublic)
 def read_users_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -83,30 +156,36 @@ def read_users_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
     username = payload.get("sub")
-    user = db.query(User).filter(User.username == username).first()
+    user = load_principal(db, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     return user
 
+@router.get("/stats")
+def auth_stats(current_user: User = Depends(get_current_user)):
+    """Cache counters for the authentication layer (admin only)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "revocation": revocation_store.stats(),
+    }
+
 # Newly added
 @router.post("/forgot-password")
 def forgot_password(email: str, db: Session = Depends(get_db)):
     """Generate a password reset token for the user"""
-    from datetime import datetime, timedelta
-    import secrets
-    
     user = db.query(User).filter(User.email == email).first()
     if not user:
         # Don't reveal if email exists or not for security
         return {"message": "If that email exists, a reset link has been sent"}
     
-    # Generate a secure random token
-    reset_token = secrets.token_urlsafe(32)
-    user.reset_token = reset_token
-    user.reset_token_expiry = datetime.utcnow() + timedelta(hours=1)
-    
-    db.commit()
+    # Only the sha256 of the token is stored
+    reset_token = issue_reset_token(db, user.id)
     logger.info(f"Password reset requested for user: {user.username}")
     
     # In production, you would send this via email
@@ -122,17 +201,23 @@ def reset_password(token: str, new_password: str, db: Session = Depends(get_db))
     """Reset password using the token"""
     from datetime import datetime
     
-    user = db.query(User).filter(User.reset_token == token).first()
-    if not user:
+    reset = find_reset_token(db, token)
+    if not reset:
         raise HTTPException(status_code=400, detail="Invalid reset token")
     
-    if not user.reset_token_expiry or user.reset_token_expiry < datetime.utcnow():
+    if reset.expires_at < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Reset token has expired")
     
-    # Update password and clear reset token
-    user.password_hash = hash_password(new_password)
-    user.reset_token = None
-    user.reset_token_expiry = None
+    user = db.query(User).filter(User.id == reset.user_id).first()
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid reset token")
+    
+    # Hash before consuming so the token's row is only locked briefly
+    password_hash = password_hasher.hash_password(new_password)
+    if not consume_reset_token(db, reset):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid reset token")
+    user.password_hash = password_hash
     
     db.commit()
     logger.info(f"Password reset successful for user: {user.username}")
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "20000"))
+TOKEN_CACHE_MAX_BYTES = int(os.getenv("TOKEN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Fixed per-entry cost on top of the payload itself (digest key, tuple, dict)
+_ENTRY_OVERHEAD_BYTES = 400
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _payload_size(payload: dict) -> int:
+    return _ENTRY_OVERHEAD_BYTES + sum(
+        sys.getsizeof(key) + sys.getsizeof(value) for key, value in payload.items()
+    )
+
+
+class VerifiedTokenCache:
+    """
+    LRU of token digest -> decoded JWT payload.
+
+    An entry is only served until the token's own ``exp``; the raw token is
+    never stored. Bounded both by entry count and by an estimate of the
+    memory held by payloads.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, digest: bytes):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            payload, expires_at, size = entry
+            if expires_at <= now:
+                del self._entries[digest]
+                self._bytes -= size
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest: bytes, payload: dict):
+        expires_at = payload.get("exp")
+        if not expires_at or self.max_entries <= 0:
+            return
+
+        size = _payload_size(payload)
+        with self._lock:
+            previous = self._entries.pop(digest, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+
+            self._entries[digest] = (payload, float(expires_at), size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, digest: bytes):
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = VerifiedTokenCache(
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=TOKEN_CACHE_MAX_BYTES,
+)
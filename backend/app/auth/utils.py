@@ -1,9 +1,44 @@
+import os
+import time
+
+from dotenv import load_dotenv
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
 
 def hash_password(plain_password: str) -> str:
     return pwd_context.hash(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Returns (is_valid, new_hash). new_hash is set when the stored hash was
+    produced with a different cost than BCRYPT_ROUNDS and should be replaced.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# =======================
+# PROCESS POOL ENTRY POINTS
+# =======================
+# These run inside the hashing worker processes. They return wall-clock
+# start/end times so the parent can split queue wait from hashing time.
+
+def timed_hash_password(plain_password: str):
+    started_at = time.time()
+    result = hash_password(plain_password)
+    return result, started_at, time.time()
+
+def timed_verify_and_update_password(plain_password: str, hashed_password: str):
+    started_at = time.time()
+    result = verify_and_update_password(plain_password, hashed_password)
+    return result, started_at, time.time()
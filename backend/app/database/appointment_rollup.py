@@ -0,0 +1,191 @@
+"""
+Incrementally maintained appointment_daily_counts rollup.
+
+Every flush that creates, deletes or changes the date/status of an
+Appointment applies +1/-1 deltas to the rollup on the same connection,
+so the counts commit (or roll back) together with the appointment rows.
+Bulk ``query.update()``/``delete()`` calls bypass the ORM and must not be
+used on appointments; Core inserts (bulk booking) pass their own deltas
+to apply_counts.
+
+    python -m app.database.appointment_rollup verify    # compare with appoint_ments
+    python -m app.database.appointment_rollup rebuild   # recompute from scratch
+"""
+import argparse
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database.models import Appointment, AppointmentDailyCount
+
+rollup = AppointmentDailyCount.__table__
+
+DEFAULT_STATUS = "scheduled"
+
+
+# ---------------- Delta tracking ----------------
+# Load the previous value on assignment so history always has it
+@event.listens_for(Appointment.status, "set", active_history=True)
+@event.listens_for(Appointment.appointment_date, "set", active_history=True)
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+def _old_and_new(state, key):
+    history = state.attrs[key].history
+    new = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault("appointment_rollup_deltas", Counter())
+
+    for obj in session.new:
+        if isinstance(obj, Appointment):
+            deltas[(obj.appointment_date, obj.status or DEFAULT_STATUS)] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            state = inspect(obj)
+            old_date, _ = _old_and_new(state, "appointment_date")
+            old_status, _ = _old_and_new(state, "status")
+            deltas[(old_date, old_status)] -= 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Appointment) and session.is_modified(obj):
+            state = inspect(obj)
+            old_date, new_date = _old_and_new(state, "appointment_date")
+            old_status, new_status = _old_and_new(state, "status")
+            if (old_date, old_status) != (new_date, new_status):
+                deltas[(old_date, old_status)] -= 1
+                deltas[(new_date, new_status)] += 1
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_deltas(session, flush_context):
+    deltas = session.info.pop("appointment_rollup_deltas", None)
+    if not deltas:
+        return
+
+    apply_counts(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_deltas(session, previous_transaction):
+    # A flush that failed (e.g. on the unique slot index) never reached
+    # after_flush; its deltas must not leak into the next flush
+    session.info.pop("appointment_rollup_deltas", None)
+
+
+def apply_counts(connection, deltas: Counter):
+    """Add (date, status) -> change deltas to the rollup on ``connection``."""
+    for (day, status), change in deltas.items():
+        if change and day is not None:
+            _upsert(connection, day, status, change)
+
+
+def _upsert(connection, day: date, status: str, change: int):
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(rollup).values(appointment_date=day, status=status, count=change)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[rollup.c.appointment_date, rollup.c.status],
+            set_={"count": rollup.c.count + stmt.excluded.count},
+        ))
+        return
+
+    updated = connection.execute(
+        update(rollup)
+        .where(rollup.c.appointment_date == day, rollup.c.status == status)
+        .values(count=rollup.c.count + change)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(rollup).values(appointment_date=day, status=status, count=change))
+
+
+# ---------------- Reads ----------------
+def get_appointment_stats(db: Session, today: date) -> dict:
+    """All admin dashboard counters in one grouped pass over the rollup."""
+    def total(condition):
+        return func.coalesce(func.sum(case((condition, rollup.c.count), else_=0)), 0)
+
+    is_today = rollup.c.appointment_date == today
+    is_scheduled = rollup.c.status == "scheduled"
+
+    row = db.execute(select(
+        total(and_(is_today, is_scheduled)).label("today"),
+        total(and_(rollup.c.appointment_date > today, is_scheduled)).label("upcoming"),
+        total(rollup.c.status == "completed").label("completed"),
+        total(rollup.c.status == "cancelled").label("cancelled"),
+        total(rollup.c.status == "rescheduled").label("rescheduled"),
+        total(is_today).label("total_today"),
+    )).one()
+    return dict(row._mapping)
+
+
+# ---------------- Verify / rebuild ----------------
+def _raw_counts(db: Session) -> dict:
+    rows = db.execute(
+        select(Appointment.appointment_date, Appointment.status, func.count())
+        .group_by(Appointment.appointment_date, Appointment.status)
+    ).all()
+    return {(day, status): count for day, status, count in rows}
+
+
+def verify(db: Session) -> list[tuple]:
+    """Returns (date, status, rollup_count, actual_count) for every mismatch."""
+    expected = _raw_counts(db)
+    stored = {
+        (day, status): count
+        for day, status, count in db.execute(
+            select(rollup.c.appointment_date, rollup.c.status, rollup.c.count)
+        ).all()
+    }
+    return [
+        (day, status, stored.get((day, status), 0), expected.get((day, status), 0))
+        for day, status in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1]))
+        if stored.get((day, status), 0) != expected.get((day, status), 0)
+    ]
+
+
+def rebuild(db: Session) -> int:
+    counts = _raw_counts(db)
+    db.execute(delete(rollup))
+    if counts:
+        db.execute(insert(rollup), [
+            {"appointment_date": day, "status": status, "count": count}
+            for (day, status), count in counts.items()
+        ])
+    db.commit()
+    return len(counts)
+
+
+def main(argv=None):
+    from app.database.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild appointment_daily_counts")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt {rebuild(db)} date/status rows")
+        mismatches = verify(db)
+    finally:
+        db.close()
+
+    for day, status, stored, actual in mismatches:
+        print(f"  {day} {status}: rollup={stored} actual={actual}")
+    print("Rollup matches appoint_ments" if not mismatches else f"{len(mismatches)} mismatches")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
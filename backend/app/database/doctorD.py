@@ -1,23 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from datetime import datetime
 from app.database.session import Base
 
-class Appointment(Base):
-    __tablename__ = "appointments"
-    id = Column(Integer, primary_key=True, index=True)
-    patient_name = Column(String)
-    time_slot = Column(String) # e.g., "10:00 AM"
-    type = Column(String)      # e.g., "Follow-up", "New Consultation"
-    status = Column(String)    # completed, in-progress, upcoming
-    date = Column(String)      # Storing as string YYYY-MM-DD for simplicity
-
 class Request(Base):
     __tablename__ = "requests"
     id = Column(Integer, primary_key=True, index=True)
     patient_name = Column(String)
     issue = Column(String)     # e.g., "Skin Allergy"
     time = Column(String)      # e.g., "12:15 PM"
-    status = Column(String)    # pending, approved, rejected
+    status = Column(String, index=True)  # pending, approved, rejected
 
 class DoctorSettings(Base):
     __tablename__ = "settings"
@@ -27,6 +18,10 @@ class DoctorSettings(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # History pages: one conversation in id (commit) order
+        Index("ix_chat_messages_patient_id_id", "patient_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, index=True) # To link chat to specific patient
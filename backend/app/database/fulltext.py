@@ -0,0 +1,225 @@
+"""
+Full-text search over chat messages and request issues.
+
+Backed by the FTS5 tables from migration 8 (SQLite only), which triggers
+keep in step with chat_messages and requests. Hits carry a snippet() with
+the matched terms wrapped in <mark> and everything else HTML-escaped.
+
+Ranking is bounded: bm25 reads every row that contains each term, so a
+query with a term found in more than FULLTEXT_RANK_WINDOW rows returns
+its newest matches (rank None) instead of the best ones. Likewise the
+last word is only searched as a prefix when it does not fill the page as
+a whole word, because a prefix term is also read in full.
+
+    python -m app.database.fulltext rebuild   # reindex from the base tables
+    python -m app.database.fulltext check     # FTS5 integrity check
+"""
+import argparse
+import html
+import os
+import re
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+load_dotenv()
+
+FULLTEXT_RANK_WINDOW = int(os.getenv("FULLTEXT_RANK_WINDOW", "1000"))
+
+FTS_TABLES = ("chat_messages_fts", "requests_fts")
+SCOPES = ("all", "chat", "requests")
+MAX_QUERY_TERMS = 10
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# snippet() marks matches with private-use code points; they survive
+# html.escape and become <mark> afterwards, so stored text cannot inject markup
+_MARKS = {"mark_start": "\ue000", "mark_end": "\ue001"}
+
+
+def _statements(fts: str, base: str, columns: str, scope: str = "") -> dict:
+    snippet = f"snippet({fts}, 0, :mark_start, :mark_end, '…', 12) AS snippet"
+    return {
+        # Does one term match more rows than the ranking window? Newest first stops early
+        "probe": text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :query ORDER BY rowid DESC LIMIT 1 OFFSET :window"),
+        # Rank and snippet inside the FTS subquery, so only the top rows are joined;
+        # the scoping columns get zero weight in bm25
+        "ranked": text(
+            f"SELECT {columns}, f.snippet, f.rank"
+            f" FROM (SELECT rowid, rank, {snippet} FROM {fts}"
+            f"  WHERE {fts} MATCH :query AND rank MATCH 'bm25(1.0, 0.0)'{scope}"
+            f"  ORDER BY rank LIMIT :limit) AS f"
+            f" JOIN {base} b ON b.id = f.rowid"
+            f" ORDER BY f.rank"
+        ),
+        "newest": text(
+            f"SELECT {columns}, f.snippet, NULL AS rank"
+            f" FROM (SELECT rowid, {snippet} FROM {fts}"
+            f"  WHERE {fts} MATCH :query{scope}"
+            f"  ORDER BY rowid DESC LIMIT :limit) AS f"
+            f" JOIN {base} b ON b.id = f.rowid"
+            f" ORDER BY f.rowid DESC"
+        ),
+    }
+
+
+_CHAT = _statements(
+    "chat_messages_fts", "chat_messages",
+    "b.id, b.patient_id, NULL AS patient_name, b.sender, b.timestamp",
+)
+_REQUEST_COLUMNS = "b.id, NULL AS patient_id, b.patient_name, NULL AS sender, NULL AS timestamp"
+_REQUESTS = _statements("requests_fts", "requests", _REQUEST_COLUMNS)
+# The patient_name phrase is case-folded and stemmed ("anna smiths" matches
+# "Anna Smith"); the exact comparison runs on its few candidates, before the LIMIT
+_REQUESTS_FOR_PATIENT = _statements(
+    "requests_fts", "requests", _REQUEST_COLUMNS,
+    scope=" AND (SELECT r.patient_name FROM requests r WHERE r.id = requests_fts.rowid) = :patient_name",
+)
+
+
+def match_terms(query: str, column: str, prefix: bool = True) -> list[str]:
+    """
+    User input -> FTS5 terms restricted to ``column``, all of which must
+    match; with ``prefix`` the last word is a prefix (search-as-you-type).
+    Quoting each word keeps FTS5 operators in the input from being
+    interpreted.
+    """
+    terms = [f'{column} : "{word}"' for word in _TERM.findall(query)[:MAX_QUERY_TERMS]]
+    if terms and prefix:
+        terms[-1] += "*"
+    return terms
+
+
+def _phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def highlight(snippet: str) -> str:
+    """snippet() output -> HTML: text escaped, matches in <mark>."""
+    return (
+        html.escape(snippet)
+        .replace(_MARKS["mark_start"], "<mark>")
+        .replace(_MARKS["mark_end"], "</mark>")
+    )
+
+
+def available(db: Session) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.execute(
+        text("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('chat_messages_fts', 'requests_fts')")
+    ).scalar() == len(FTS_TABLES)
+
+
+def _search_source(
+    db: Session, statements: dict, source: str, terms: list[str], limit: int, params: dict,
+) -> list[dict]:
+    too_common = any(
+        db.execute(statements["probe"], {"query": term, "window": FULLTEXT_RANK_WINDOW}).first() is not None
+        for term in terms
+    )
+    rows = db.execute(
+        statements["newest" if too_common else "ranked"],
+        {"query": " AND ".join(terms), "limit": limit, **_MARKS, **params},
+    ).mappings()
+    return [{**row, "source": source, "snippet": highlight(row["snippet"])} for row in rows]
+
+
+def _search_words(
+    db: Session, statements: dict, source: str, query: str, column: str, scoping: list, limit: int,
+    params: dict | None = None,
+):
+    """Whole words first; the last word as a prefix only if that leaves room."""
+    hits = []
+    for prefix in (False, True):
+        terms = match_terms(query, column, prefix=prefix)
+        if not terms:
+            return []
+        # Scoping terms join the match: FTS intersects the posting lists
+        hits = _search_source(db, statements, source, terms + scoping, limit, params or {})
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def search(
+    db: Session,
+    query: str,
+    scope: str = "all",
+    patient_id: int | None = None,
+    patient_name: str | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """Best ``limit`` hits across the requested sources, best first."""
+    if scope not in SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(SCOPES)}")
+    if not available(db):
+        raise HTTPException(status_code=503, detail="Full-text search is not available on this database")
+
+    hits = []
+    if scope in ("all", "chat"):
+        scoping = [f"patient_id : {_phrase(str(patient_id))}"] if patient_id is not None else []
+        hits.extend(_search_words(db, _CHAT, "chat", query, "text", scoping, limit))
+
+    if scope in ("all", "requests") and patient_id is None:
+        # Requests are keyed by name only; an id-scoped search skips them
+        if patient_name:
+            hits.extend(_search_words(
+                db, _REQUESTS_FOR_PATIENT, "request", query, "issue",
+                [f"patient_name : {_phrase(patient_name)}"], limit, {"patient_name": patient_name},
+            ))
+        else:
+            hits.extend(_search_words(db, _REQUESTS, "request", query, "issue", [], limit))
+
+    # bm25 is lower-is-better; unranked (newest first) hits follow the ranked ones
+    hits.sort(key=lambda hit: (hit["rank"] is None, hit["rank"] or 0.0))
+    return hits[:limit]
+
+
+# ---------------- Maintenance ----------------
+def rebuild(db: Session):
+    for table in FTS_TABLES:
+        db.execute(text(f"INSERT INTO {table} ({table}) VALUES ('rebuild')"))
+        db.execute(text(f"INSERT INTO {table} ({table}) VALUES ('optimize')"))
+    db.commit()
+
+
+def check(db: Session) -> list[str]:
+    """Names of the FTS tables whose index disagrees with their content."""
+    broken = []
+    for table in FTS_TABLES:
+        try:
+            db.execute(text(f"INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 1)"))
+        except Exception:
+            broken.append(table)
+        db.rollback()
+    return broken
+
+
+def main(argv=None):
+    from app.database.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintain the full-text search indexes")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if not available(db):
+            print("Full-text indexes are missing; run `python -m app.database.migrate upgrade` on SQLite")
+            raise SystemExit(1)
+        if args.command == "rebuild":
+            rebuild(db)
+            print(f"Rebuilt {', '.join(FTS_TABLES)}")
+        broken = check(db)
+    finally:
+        db.close()
+
+    print("Full-text indexes are consistent" if not broken else f"Out of step: {', '.join(broken)}")
+    raise SystemExit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
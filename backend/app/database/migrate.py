@@ -0,0 +1,128 @@
+"""
+Versioned schema migrations.
+
+Migration scripts live in app/database/migrations as ``mNNNN_<name>.py``
+modules defining ``VERSION``, ``DESCRIPTION`` and ``upgrade(connection)``.
+Applied versions are recorded in the ``schema_migrations`` table.
+
+    python -m app.database.migrate bootstrap   # once per database: create missing tables, then upgrade
+    python -m app.database.migrate upgrade     # apply pending migrations
+    python -m app.database.migrate current     # print applied / expected version
+
+Workers never change the schema; they only call verify_schema_version at boot.
+"""
+import argparse
+import importlib
+import logging
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select
+
+logger = logging.getLogger("my_app")
+
+MIGRATIONS_PACKAGE = "app.database.migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+_MODULE_PATTERN = re.compile(r"^m(\d{4})_\w+\.py$")
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def load_migrations() -> list:
+    modules = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if _MODULE_PATTERN.match(filename):
+            modules.append(importlib.import_module(f"{MIGRATIONS_PACKAGE}.{filename[:-3]}"))
+
+    versions = [m.VERSION for m in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return sorted(modules, key=lambda m: m.VERSION)
+
+
+def latest_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].VERSION if migrations else 0
+
+
+def current_version(connection) -> int:
+    if not connection.dialect.has_table(connection, schema_migrations.name):
+        return 0
+    return connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine) -> list[int]:
+    """Apply every pending migration, each in its own transaction."""
+    with engine.begin() as conn:
+        _metadata.create_all(conn)
+        applied = current_version(conn)
+
+    done = []
+    for migration in load_migrations():
+        if migration.VERSION <= applied:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.VERSION,
+                description=migration.DESCRIPTION,
+                applied_at=datetime.utcnow(),
+            ))
+        logger.info(f"Applied migration {migration.VERSION}: {migration.DESCRIPTION}")
+        done.append(migration.VERSION)
+    return done
+
+
+def bootstrap(engine) -> list[int]:
+    """Create any tables that do not exist yet, then run pending migrations."""
+    from app.database.session import Base
+    import app.database.models  # noqa: F401  (register tables)
+    import app.database.doctorD  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    return upgrade(engine)
+
+
+def verify_schema_version(engine):
+    """Fail fast at worker boot if the database is behind the code."""
+    expected = latest_version()
+    with engine.connect() as conn:
+        found = current_version(conn)
+
+    if found < expected:
+        raise RuntimeError(
+            f"Database schema is at version {found} but the code expects {expected}. "
+            "Run `python -m app.database.migrate bootstrap` (new database) "
+            "or `python -m app.database.migrate upgrade`."
+        )
+    if found > expected:
+        logger.warning(f"Database schema version {found} is newer than the code ({expected})")
+
+
+def main(argv=None):
+    from app.database.session import engine
+
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", choices=["bootstrap", "upgrade", "current"])
+    args = parser.parse_args(argv)
+
+    if args.command == "current":
+        with engine.connect() as conn:
+            print(f"applied: {current_version(conn)}  expected: {latest_version()}")
+        return
+
+    done = bootstrap(engine) if args.command == "bootstrap" else upgrade(engine)
+    print(f"Applied migrations: {done}" if done else "Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
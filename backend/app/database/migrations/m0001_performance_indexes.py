@@ -0,0 +1,18 @@
+"""Indexes for the hot per-user and per-status filters."""
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = "performance index pack"
+
+INDEXES = [
+    ("ix_family_members_user_id", "family_members", "user_id"),
+    ("ix_notifications_user_id_created_at", "notifications", "user_id, created_at"),
+    ("ix_doctor_payments_doctor_id_created_at", "doctor_payments", "doctor_id, created_at"),
+    ("ix_chat_messages_patient_id_timestamp", "chat_messages", "patient_id, timestamp"),
+    ("ix_requests_status", "requests", "status"),
+]
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,19 @@
+"""Composite indexes matching the (date, time, id) keyset of admin listings."""
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPTION = "appointment keyset pagination indexes"
+
+INDEXES = [
+    ("ix_appoint_ments_date_time_id", "appoint_ments",
+     "appointment_date, appointment_time, id"),
+    ("ix_appoint_ments_doctor_date_time_id", "appoint_ments",
+     "doctor_id, appointment_date, appointment_time, id"),
+    ("ix_appoint_ments_status_date_time_id", "appoint_ments",
+     "status, appointment_date, appointment_time, id"),
+]
+
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,21 @@
+"""Per-date/per-status appointment rollup, backfilled from appoint_ments."""
+from sqlalchemy import text
+
+VERSION = 3
+DESCRIPTION = "appointment daily counts rollup"
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS appointment_daily_counts ("
+        " appointment_date DATE NOT NULL,"
+        " status VARCHAR(20) NOT NULL,"
+        " count INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (appointment_date, status))"
+    ))
+    connection.execute(text("DELETE FROM appointment_daily_counts"))
+    connection.execute(text(
+        "INSERT INTO appointment_daily_counts (appointment_date, status, count)"
+        " SELECT appointment_date, status, COUNT(*) FROM appoint_ments"
+        " GROUP BY appointment_date, status"
+    ))
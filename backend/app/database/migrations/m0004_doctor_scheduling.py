@@ -0,0 +1,43 @@
+"""Working-hours templates and the one-booking-per-slot guarantee."""
+from sqlalchemy import text
+
+VERSION = 4
+DESCRIPTION = "doctor working hours and unique slot index"
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS doctor_working_hours ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " doctor_id INTEGER NOT NULL REFERENCES doctors (id),"
+        " weekday INTEGER NOT NULL,"
+        " start_time VARCHAR(5) NOT NULL,"
+        " end_time VARCHAR(5) NOT NULL,"
+        " slot_minutes INTEGER NOT NULL DEFAULT 30)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_doctor_working_hours_doctor_weekday"
+        " ON doctor_working_hours (doctor_id, weekday)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_doctor_working_hours_id ON doctor_working_hours (id)"
+    ))
+
+    # Existing double bookings would make the unique index fail; surface them
+    duplicates = connection.execute(text(
+        "SELECT doctor_id, appointment_date, appointment_time, COUNT(*)"
+        " FROM appoint_ments WHERE status != 'cancelled'"
+        " GROUP BY doctor_id, appointment_date, appointment_time HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        listing = ", ".join(f"doctor {d} on {day} {t} ({n}x)" for d, day, t, n in duplicates[:20])
+        raise RuntimeError(
+            f"Cannot add unique slot index: {len(duplicates)} double-booked slots "
+            f"must be cancelled or moved first: {listing}"
+        )
+
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_appoint_ments_doctor_slot"
+        " ON appoint_ments (doctor_id, appointment_date, appointment_time)"
+        " WHERE status != 'cancelled'"
+    ))
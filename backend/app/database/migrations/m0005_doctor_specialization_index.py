@@ -0,0 +1,11 @@
+"""Index for filtering doctors by specialization."""
+from sqlalchemy import text
+
+VERSION = 5
+DESCRIPTION = "doctors.specialization index"
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_doctors_specialization ON doctors (specialization)"
+    ))
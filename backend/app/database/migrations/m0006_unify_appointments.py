@@ -0,0 +1,211 @@
+"""
+Single appointment store: the doctor dashboard's legacy ``appointments``
+table (string date/time/status, patient by name only) is folded into
+appoint_ments, which gains ``type`` and ``patient_name`` and allows rows
+without a registered patient.
+
+Legacy rows have no doctor; they are assigned to LEGACY_APPOINTMENTS_DOCTOR_ID
+or, if unset, the lowest doctor id (the old dashboard served one doctor).
+Rows whose date or time cannot be parsed, or whose slot is already taken,
+stay in ``appointments`` and are logged.
+"""
+import logging
+import os
+import re
+from datetime import date
+
+from sqlalchemy import inspect, text
+
+VERSION = 6
+DESCRIPTION = "unify legacy appointments into appoint_ments"
+
+logger = logging.getLogger("my_app")
+
+LEGACY_STATUSES = {
+    "upcoming": "scheduled",
+    "scheduled": "scheduled",
+    "in progress": "in_progress",
+    "in-progress": "in_progress",
+    "in_progress": "in_progress",
+    "completed": "completed",
+    "cancelled": "cancelled",
+}
+
+_TIME = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?\s*$")
+
+# Every index on appoint_ments, recreated after the SQLite table rebuild
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_id ON appoint_ments (id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_patient_id ON appoint_ments (patient_id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_doctor_id ON appoint_ments (doctor_id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_appointment_date ON appoint_ments (appointment_date)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_status ON appoint_ments (status)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_date_time_id"
+    " ON appoint_ments (appointment_date, appointment_time, id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_doctor_date_time_id"
+    " ON appoint_ments (doctor_id, appointment_date, appointment_time, id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_status_date_time_id"
+    " ON appoint_ments (status, appointment_date, appointment_time, id)",
+    "CREATE INDEX IF NOT EXISTS ix_appoint_ments_doctor_date_status"
+    " ON appoint_ments (doctor_id, appointment_date, status)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_appoint_ments_doctor_slot"
+    " ON appoint_ments (doctor_id, appointment_date, appointment_time)"
+    " WHERE status != 'cancelled'",
+]
+
+
+def _parse_time(value):
+    match = _TIME.match(value or "")
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if meridiem:
+        # Legacy data has "14:00 PM"; only 1-12 are shifted
+        if meridiem.lower() == "pm" and hour < 12:
+            hour += 12
+        elif meridiem.lower() == "am" and hour == 12:
+            hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _parse_date(value, today):
+    if value and value.strip().lower() == "today":
+        return today  # the old dashboard showed these rows every day
+    try:
+        return date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def _make_patient_optional(connection):
+    columns = {c["name"]: c for c in inspect(connection).get_columns("appoint_ments")}
+    if columns["patient_id"]["nullable"]:
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("ALTER TABLE appoint_ments ALTER COLUMN patient_id DROP NOT NULL"))
+        return
+    if dialect != "sqlite":
+        connection.execute(text("ALTER TABLE appoint_ments MODIFY patient_id INTEGER NULL"))
+        return
+
+    # SQLite cannot relax NOT NULL in place: copy into a rebuilt table
+    connection.execute(text(
+        "CREATE TABLE appoint_ments_new ("
+        " id INTEGER NOT NULL PRIMARY KEY,"
+        " patient_id INTEGER REFERENCES users (id),"
+        " doctor_id INTEGER NOT NULL REFERENCES doctors (id),"
+        " appointment_date DATE NOT NULL,"
+        " appointment_time VARCHAR(10) NOT NULL,"
+        " status VARCHAR(20) NOT NULL,"
+        " type VARCHAR(50),"
+        " patient_name VARCHAR(100),"
+        " reason TEXT,"
+        " created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),"
+        " updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP))"
+    ))
+    connection.execute(text(
+        "INSERT INTO appoint_ments_new"
+        " (id, patient_id, doctor_id, appointment_date, appointment_time, status,"
+        "  type, patient_name, reason, created_at, updated_at)"
+        " SELECT id, patient_id, doctor_id, appointment_date, appointment_time, status,"
+        "  type, patient_name, reason, created_at, updated_at FROM appoint_ments"
+    ))
+    connection.execute(text("DROP TABLE appoint_ments"))
+    connection.execute(text("ALTER TABLE appoint_ments_new RENAME TO appoint_ments"))
+
+
+def _move_legacy_rows(connection):
+    if not inspect(connection).has_table("appointments"):
+        return
+
+    rows = connection.execute(text(
+        "SELECT id, patient_name, time_slot, type, status, date FROM appointments"
+    )).all()
+    if not rows:
+        return
+
+    doctor_id = os.getenv("LEGACY_APPOINTMENTS_DOCTOR_ID")
+    if doctor_id is None:
+        doctor_id = connection.execute(text("SELECT MIN(id) FROM doctors")).scalar()
+    if doctor_id is None:
+        raise RuntimeError(
+            f"{len(rows)} legacy appointments need a doctor: add one or set "
+            "LEGACY_APPOINTMENTS_DOCTOR_ID"
+        )
+    doctor_id = int(doctor_id)
+
+    users = {
+        username.lower(): user_id
+        for user_id, username in connection.execute(text("SELECT id, username FROM users"))
+    }
+    taken = {
+        (str(day), hhmm) for day, hhmm in connection.execute(text(
+            "SELECT appointment_date, appointment_time FROM appoint_ments"
+            " WHERE doctor_id = :doctor_id AND status != 'cancelled'"
+        ), {"doctor_id": doctor_id})
+    }
+
+    today = date.today()
+    moved, left = [], []
+    for legacy_id, patient_name, time_slot, kind, status, day in rows:
+        parsed_day = _parse_date(day, today)
+        hhmm = _parse_time(time_slot)
+        status = LEGACY_STATUSES.get((status or "upcoming").strip().lower(), "scheduled")
+        live = status != "cancelled"
+        if parsed_day is None or hhmm is None or (live and (parsed_day.isoformat(), hhmm) in taken):
+            left.append(legacy_id)
+            continue
+        if live:
+            taken.add((parsed_day.isoformat(), hhmm))
+
+        connection.execute(text(
+            "INSERT INTO appoint_ments"
+            " (patient_id, doctor_id, appointment_date, appointment_time, status, type, patient_name)"
+            " VALUES (:patient_id, :doctor_id, :day, :hhmm, :status, :type, :patient_name)"
+        ), {
+            "patient_id": users.get((patient_name or "").lower()),
+            "doctor_id": doctor_id,
+            "day": parsed_day,
+            "hhmm": hhmm,
+            "status": status,
+            "type": kind,
+            "patient_name": patient_name,
+        })
+        moved.append(legacy_id)
+
+    if moved:
+        connection.execute(
+            text("DELETE FROM appointments WHERE id IN (" + ", ".join(map(str, moved)) + ")")
+        )
+    logger.info(f"Moved {len(moved)} legacy appointments to appoint_ments (doctor {doctor_id})")
+    if left:
+        logger.warning(
+            f"{len(left)} legacy appointments with an unparseable date/time or a taken slot "
+            f"were left in 'appointments': ids {left[:50]}"
+        )
+
+
+def upgrade(connection):
+    columns = {c["name"] for c in inspect(connection).get_columns("appoint_ments")}
+    if "type" not in columns:
+        connection.execute(text("ALTER TABLE appoint_ments ADD COLUMN type VARCHAR(50)"))
+    if "patient_name" not in columns:
+        connection.execute(text("ALTER TABLE appoint_ments ADD COLUMN patient_name VARCHAR(100)"))
+
+    _make_patient_optional(connection)
+    for statement in INDEXES:
+        connection.execute(text(statement))
+
+    _move_legacy_rows(connection)
+
+    # Raw inserts bypass the ORM rollup listeners; recount from the table
+    connection.execute(text("DELETE FROM appointment_daily_counts"))
+    connection.execute(text(
+        "INSERT INTO appointment_daily_counts (appointment_date, status, count)"
+        " SELECT appointment_date, status, COUNT(*) FROM appoint_ments"
+        " GROUP BY appointment_date, status"
+    ))
@@ -0,0 +1,14 @@
+"""(patient_id, timestamp, id) index for cursor-paginated chat history."""
+from sqlalchemy import text
+
+VERSION = 7
+DESCRIPTION = "chat history keyset index"
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_patient_ts_id"
+        " ON chat_messages (patient_id, timestamp, id)"
+    ))
+    # Its leading columns are a prefix of the new index
+    connection.execute(text("DROP INDEX IF EXISTS ix_chat_messages_patient_id_timestamp"))
@@ -0,0 +1,68 @@
+"""
+FTS5 indexes over chat_messages.text and requests.issue (SQLite only).
+
+External-content tables: the text stays in the base tables and triggers
+keep the indexes in step with every insert, update and delete. The
+scoping columns (chat patient_id, request patient_name) are indexed too,
+so a per-patient search intersects posting lists instead of filtering
+matches afterwards. Two- and three-character prefixes get their own index
+entries, so search-as-you-type does not merge every matching term's list.
+"""
+import logging
+
+from sqlalchemy import text
+
+VERSION = 8
+DESCRIPTION = "full-text search over chat messages and requests"
+
+logger = logging.getLogger("my_app")
+
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5("
+    " text, patient_id, content='chat_messages', content_rowid='id',"
+    " tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN"
+    " INSERT INTO chat_messages_fts (rowid, text, patient_id) VALUES (new.id, new.text, new.patient_id);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN"
+    " INSERT INTO chat_messages_fts (chat_messages_fts, rowid, text, patient_id)"
+    " VALUES ('delete', old.id, old.text, old.patient_id);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE ON chat_messages BEGIN"
+    " INSERT INTO chat_messages_fts (chat_messages_fts, rowid, text, patient_id)"
+    " VALUES ('delete', old.id, old.text, old.patient_id);"
+    " INSERT INTO chat_messages_fts (rowid, text, patient_id) VALUES (new.id, new.text, new.patient_id);"
+    " END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5("
+    " issue, patient_name, content='requests', content_rowid='id',"
+    " tokenize='porter unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS requests_fts_ai AFTER INSERT ON requests BEGIN"
+    " INSERT INTO requests_fts (rowid, issue, patient_name) VALUES (new.id, new.issue, new.patient_name);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS requests_fts_ad AFTER DELETE ON requests BEGIN"
+    " INSERT INTO requests_fts (requests_fts, rowid, issue, patient_name)"
+    " VALUES ('delete', old.id, old.issue, old.patient_name);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS requests_fts_au AFTER UPDATE ON requests BEGIN"
+    " INSERT INTO requests_fts (requests_fts, rowid, issue, patient_name)"
+    " VALUES ('delete', old.id, old.issue, old.patient_name);"
+    " INSERT INTO requests_fts (rowid, issue, patient_name) VALUES (new.id, new.issue, new.patient_name);"
+    " END",
+
+    # Index the rows that already exist
+    "INSERT INTO chat_messages_fts (chat_messages_fts) VALUES ('rebuild')",
+    "INSERT INTO requests_fts (requests_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(connection):
+    if connection.dialect.name != "sqlite":
+        logger.warning("Full-text search indexes are SQLite (FTS5) only; skipped")
+        return
+    if not connection.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        logger.warning("This SQLite build has no FTS5; full-text search stays disabled")
+        return
+
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -0,0 +1,14 @@
+"""(patient_id, id) index: chat history pages in commit order."""
+from sqlalchemy import text
+
+VERSION = 9
+DESCRIPTION = "chat history keyset index on id"
+
+
+def upgrade(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_patient_id_id"
+        " ON chat_messages (patient_id, id)"
+    ))
+    # Pages are no longer keyed on timestamp
+    connection.execute(text("DROP INDEX IF EXISTS ix_chat_messages_patient_ts_id"))
@@ -0,0 +1,16 @@
+"""appoint_ments.started_at: when a consultation went in progress."""
+from sqlalchemy import inspect, text
+
+VERSION = 10
+DESCRIPTION = "consultation start time"
+
+
+def upgrade(connection):
+    columns = {c["name"] for c in inspect(connection).get_columns("appoint_ments")}
+    if "started_at" not in columns:
+        connection.execute(text("ALTER TABLE appoint_ments ADD COLUMN started_at DATETIME"))
+    # Best available start for consultations already running: their last change
+    connection.execute(text(
+        "UPDATE appoint_ments SET started_at = updated_at"
+        " WHERE status = 'in_progress' AND started_at IS NULL"
+    ))
@@ -0,0 +1,11 @@
+"""appoint_ments.revision: per-row update counter for export ETags."""
+from sqlalchemy import inspect, text
+
+VERSION = 11
+DESCRIPTION = "appointment revision counter"
+
+
+def upgrade(connection):
+    columns = {c["name"] for c in inspect(connection).get_columns("appoint_ments")}
+    if "revision" not in columns:
+        connection.execute(text("ALTER TABLE appoint_ments ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
@@ -0,0 +1,45 @@
+"""
+Prefix indexes (2 and 3 characters) on the FTS5 tables from migration 8.
+
+Databases that ran migration 8 before it declared ``prefix='2 3'`` get
+their FTS tables recreated and rebuilt from the base tables; the triggers
+only name the tables, so they stay as they are. Newer databases already
+have the prefix indexes and are skipped.
+"""
+import logging
+
+from sqlalchemy import text
+
+VERSION = 12
+DESCRIPTION = "full-text prefix indexes"
+
+logger = logging.getLogger("my_app")
+
+TABLES = {
+    "chat_messages_fts": (
+        "CREATE VIRTUAL TABLE chat_messages_fts USING fts5("
+        " text, patient_id, content='chat_messages', content_rowid='id',"
+        " tokenize='porter unicode61', prefix='2 3')"
+    ),
+    "requests_fts": (
+        "CREATE VIRTUAL TABLE requests_fts USING fts5("
+        " issue, patient_name, content='requests', content_rowid='id',"
+        " tokenize='porter unicode61', prefix='2 3')"
+    ),
+}
+
+
+def upgrade(connection):
+    if connection.dialect.name != "sqlite":
+        return
+
+    for table, create in TABLES.items():
+        sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+        ).scalar()
+        if sql is None or "prefix=" in sql:
+            continue  # no FTS5 here (see migration 8), or already indexed
+        logger.info(f"Rebuilding {table} with prefix indexes")
+        connection.execute(text(f"DROP TABLE {table}"))
+        connection.execute(text(create))
+        connection.execute(text(f"INSERT INTO {table} ({table}) VALUES ('rebuild')"))
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, Time, Text, ForeignKey
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Date, Time, Text, ForeignKey, Float, Index, event
+from sqlalchemy.sql import func, text
 from .session import Base
 from datetime import datetime
 from fastapi import UploadFile, File
@@ -27,7 +27,7 @@ class Doctor(Base):
     __tablename__ = "doctors"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    specialization = Column(String(50), nullable=False)
+    specialization = Column(String(50), nullable=False, index=True)
     experience = Column(Integer, nullable=False)
     consultation_fee = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -44,7 +44,7 @@ class ConfigMaster(Base):
 class FamilyMember(Base):
     __tablename__ = "family_members"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
 
     name = Column(String(100), nullable=False)
     relation = Column(String(50), nullable=False)
@@ -66,15 +66,69 @@ class HealthReport(Base):
 
 class Appointment(Base):
     __tablename__ = "appoint_ments"
+    __table_args__ = (
+        Index("ix_appoint_ments_date_time_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appoint_ments_doctor_date_time_id", "doctor_id", "appointment_date", "appointment_time", "id"),
+        Index("ix_appoint_ments_status_date_time_id", "status", "appointment_date", "appointment_time", "id"),
+        # Doctor schedule: one doctor's date range, optionally by status
+        Index("ix_appoint_ments_doctor_date_status", "doctor_id", "appointment_date", "status"),
+        # One live booking per doctor slot; enforced by the database so
+        # concurrent reservations cannot both succeed
+        Index(
+            "ux_appoint_ments_doctor_slot",
+            "doctor_id", "appointment_date", "appointment_time",
+            unique=True,
+            sqlite_where=text("status != 'cancelled'"),
+            postgresql_where=text("status != 'cancelled'"),
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # NULL for patients known only by name (moved from the legacy dashboard table)
+    patient_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
     appointment_date = Column(Date, nullable=False, index=True)
     appointment_time = Column(String(10), nullable=False)  # Store as "HH:MM" format
-    status = Column(String(20), default="scheduled", nullable=False, index=True)  # scheduled, completed, cancelled, rescheduled
+    status = Column(String(20), default="scheduled", nullable=False, index=True)  # scheduled, in_progress, completed, cancelled, rescheduled
+    type = Column(String(50), nullable=True)  # e.g., "Follow-up", "New Consultation"
+    patient_name = Column(String(100), nullable=True)  # display name when patient_id is NULL
     reason = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Naive UTC; when the consultation went in progress (the dashboard timer)
+    started_at = Column(DateTime, nullable=True)
+    # Bumped by every UPDATE; export ETags sum it since updated_at has
+    # one-second resolution on SQLite
+    revision = Column(Integer, nullable=False, default=0, server_default="0", onupdate=text("revision + 1"))
+
+    # Load with joinedload()/selectinload() when listing; never per row
+    patient = relationship("User")
+    doctor = relationship("Doctor")
+
+
+@event.listens_for(Appointment.status, "set")
+def _stamp_consultation_start(target, value, oldvalue, initiator):
+    if value == "in_progress" and oldvalue != "in_progress":
+        target.started_at = datetime.utcnow()
+
+class DoctorWorkingHours(Base):
+    """Weekly template: doctor sees patients on ``weekday`` (0=Monday) from start to end."""
+    __tablename__ = "doctor_working_hours"
+    __table_args__ = (
+        Index("ix_doctor_working_hours_doctor_weekday", "doctor_id", "weekday"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    weekday = Column(Integer, nullable=False)
+    start_time = Column(String(5), nullable=False)  # "HH:MM"
+    end_time = Column(String(5), nullable=False)    # "HH:MM", exclusive
+    slot_minutes = Column(Integer, nullable=False, default=30)
+
+class AppointmentDailyCount(Base):
+    """Per-date/per-status appointment counts, kept in step by appointment_rollup."""
+    __tablename__ = "appointment_daily_counts"
+    appointment_date = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 class Patient(Base):
     __tablename__ = "patients"  # Changed from _tablename_
@@ -108,6 +162,9 @@ from sqlalchemy import Enum, Boolean
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -127,6 +184,9 @@ class PaymentStatus(enum.Enum):
 
 class DoctorPayment(Base):
     __tablename__ = "doctor_payments"
+    __table_args__ = (
+        Index("ix_doctor_payments_doctor_id_created_at", "doctor_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -141,3 +201,32 @@ class DoctorPayment(Base):
     appointment_id = Column(Integer, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(64), unique=True, index=True, nullable=False)
+    token_type = Column(String(16), nullable=False)  # access, refresh
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PasswordResetToken(Base):
+    __tablename__ = "password_reset_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256 hex
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ReplicationHeartbeat(Base):
+    __tablename__ = "replication_heartbeat"
+
+    # Single row (id=1) written on the primary; replicas are judged by how
+    # far behind their copy of beat_at (epoch seconds) is.
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(Float, nullable=False)
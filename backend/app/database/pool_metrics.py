@@ -0,0 +1,134 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Connection pool counters for one engine, fed by pool events."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.lifetime_count = 0
+        self.lifetime_total = 0.0
+        self.lifetime_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_close(self, connection_record):
+        opened_at = connection_record.info.pop("opened_at", None)
+        with self._lock:
+            self.closes += 1
+            if opened_at is not None:
+                lifetime = time.monotonic() - opened_at
+                self.lifetime_count += 1
+                self.lifetime_total += lifetime
+                self.lifetime_max = max(self.lifetime_max, lifetime)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "closes": self.closes,
+                "invalidations": self.invalidations,
+                "wait": {
+                    "count": self.waits,
+                    "avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                    "max_ms": round(self.wait_max * 1000, 3),
+                },
+                "connection_lifetime": {
+                    "closed": self.lifetime_count,
+                    "avg_seconds": round(self.lifetime_total / self.lifetime_count, 1)
+                    if self.lifetime_count else 0.0,
+                    "max_seconds": round(self.lifetime_max, 1),
+                },
+            }
+
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                overflow=pool.overflow(),
+                idle=pool.checkedin(),
+            )
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long callers wait to obtain a connection."""
+
+    metrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+_registry = {}
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    metrics = PoolMetrics(name)
+    _registry[name] = (engine, metrics)
+
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info["opened_at"] = time.monotonic()
+        with metrics._lock:
+            metrics.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with metrics._lock:
+            metrics.checked_out += 1
+            metrics.checkouts += 1
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.checked_out -= 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.invalidations += 1
+
+    @event.listens_for(engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        metrics.record_close(connection_record)
+
+    return metrics
+
+
+def pool_stats() -> dict:
+    return {
+        name: metrics.snapshot(engine.pool)
+        for name, (engine, metrics) in _registry.items()
+    }
@@ -0,0 +1,174 @@
+"""
+Read-replica routing for the sync session.
+
+GET requests are served from a healthy replica unless the same client wrote
+within the last REPLICA_STICKY_SECONDS (read-your-writes). Replicas that fail
+a health probe or fall more than REPLICA_MAX_LAG_SECONDS behind the primary's
+heartbeat are ejected until they recover.
+
+For local testing with SQLite, replicas can be plain file copies:
+
+    DATABASE_REPLICA_URLS=sqlite:///./replica1.db,sqlite:///./replica2.db
+    python -m app.database.replicas sync [--interval 2]
+"""
+import argparse
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger("my_app")
+
+
+class Replica:
+    def __init__(self, name: str, url: str, engine):
+        self.name = name
+        self.url = url
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.healthy = True
+        self.lag_seconds = None
+        self.last_error = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, urls: list[str], engine_factory, sticky_seconds: float, max_lag_seconds: float):
+        self.replicas = [
+            Replica(f"replica-{i}", url, engine_factory(url, name=f"replica-{i}"))
+            for i, url in enumerate(urls)
+        ]
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._round_robin = itertools.count()
+        self._recent_writers = {}
+        self._lock = threading.Lock()
+
+    # ---------------- Routing ----------------
+    def session(self):
+        """A session on the next healthy replica, or None if none is usable."""
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        replica = healthy[next(self._round_robin) % len(healthy)]
+        return replica.session_factory()
+
+    def mark_write(self, identity: str | None):
+        if not identity or not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[identity] = now + self.sticky_seconds
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {
+                    key: until for key, until in self._recent_writers.items() if until > now
+                }
+
+    def is_sticky(self, identity: str | None) -> bool:
+        if not identity:
+            return False
+        until = self._recent_writers.get(identity)
+        return until is not None and until > time.monotonic()
+
+    # ---------------- Health ----------------
+    def check_health(self, primary_engine):
+        """Beat the primary's heartbeat row, then probe each replica."""
+        if not self.replicas:
+            return
+
+        beat_at = time.time()
+        with primary_engine.begin() as conn:
+            updated = conn.execute(
+                text("UPDATE replication_heartbeat SET beat_at = :beat_at WHERE id = 1"),
+                {"beat_at": beat_at},
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    text("INSERT INTO replication_heartbeat (id, beat_at) VALUES (1, :beat_at)"),
+                    {"beat_at": beat_at},
+                )
+
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica_beat = conn.execute(
+                        text("SELECT beat_at FROM replication_heartbeat WHERE id = 1")
+                    ).scalar()
+            except Exception as exc:
+                self._eject(replica, f"{type(exc).__name__}: {exc}")
+                continue
+
+            replica.lag_seconds = None if replica_beat is None else max(0.0, beat_at - replica_beat)
+            if (
+                self.max_lag_seconds > 0
+                and (replica.lag_seconds is None or replica.lag_seconds > self.max_lag_seconds)
+            ):
+                self._eject(replica, f"lag {replica.lag_seconds}s exceeds {self.max_lag_seconds}s")
+                continue
+
+            if not replica.healthy:
+                logger.info(f"Read replica {replica.name} restored")
+            replica.healthy = True
+            replica.last_error = None
+
+    def _eject(self, replica: Replica, reason: str):
+        if replica.healthy:
+            logger.warning(f"Ejecting read replica {replica.name}: {reason}")
+        replica.healthy = False
+        replica.last_error = reason
+
+    def status(self) -> list[dict]:
+        return [replica.status() for replica in self.replicas]
+
+
+# ---------------- Local SQLite replicas ----------------
+def copy_sqlite_database(source_path: str, target_path: str):
+    """Consistent online copy using SQLite's backup API."""
+    import sqlite3
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main(argv=None):
+    from sqlalchemy.engine import make_url
+    from app.database.session import DATABASE_URL, DATABASE_REPLICA_URLS
+
+    parser = argparse.ArgumentParser(description="Copy the SQLite primary onto its file replicas")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds")
+    args = parser.parse_args(argv)
+
+    primary = make_url(DATABASE_URL)
+    replicas = [make_url(url) for url in DATABASE_REPLICA_URLS]
+    if primary.get_backend_name() != "sqlite" or any(
+        url.get_backend_name() != "sqlite" for url in replicas
+    ):
+        parser.error("sync only supports SQLite file databases")
+
+    while True:
+        for url in replicas:
+            copy_sqlite_database(primary.database, url.database)
+            print(f"Copied {primary.database} -> {url.database}")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,145 @@
-# DB session placeholder 
-from sqlalchemy import create_engine
+# DB session placeholder
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+import hashlib
 import os
 from dotenv import load_dotenv
 
+from app.database.pool_metrics import InstrumentedQueuePool, instrument_engine
+from app.database.replicas import ReplicaSet
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./telemedicine.db")
 # Newly added
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Comma-separated read replicas; empty means every query goes to the primary
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("REPLICA_HEALTH_INTERVAL_SECONDS", "5"))
+
+# Server databases (PostgreSQL, MySQL, ...)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# Durability of each commit: FULL survives power loss, NORMAL (with WAL) a process crash
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def build_engine(database_url: str, name: str = "primary"):
+    """
+    Create an engine tuned for the backend behind ``database_url`` and
+    register its pool with the telemetry in pool_metrics.
+    """
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite":
+        kwargs = {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+        if not _is_sqlite_memory(url):
+            # One file, many readers under WAL; the pool just bounds threads
+            kwargs.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+            )
+        engine = create_engine(url, **kwargs)
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    instrument_engine(engine, name)
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_set = ReplicaSet(
+    DATABASE_REPLICA_URLS,
+    build_engine,
+    sticky_seconds=REPLICA_STICKY_SECONDS,
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS,
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+def _client_identity(request: Request) -> str | None:
+    # The bearer token identifies a user session well enough for a few
+    # seconds of stickiness without decoding it here
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else None
+
+
+def get_db(request: Request):
+    """
+    Session for the current request: a read replica for GET/HEAD unless the
+    client wrote within REPLICA_STICKY_SECONDS, otherwise the primary.
+    """
+    read_only = request.method in READ_ONLY_METHODS
+    identity = _client_identity(request)
+
+    db = None
+    if read_only and not replica_set.is_sticky(identity):
+        db = replica_set.session()
+    if db is None:
+        db = SessionLocal()
+        db.info["client_identity"] = identity
+
     try:
         yield db
     finally:
         db.close()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_client_sticky(session):
+    # At commit, not at teardown: dependency teardown can run after the
+    # response is sent, leaving the client's next GET on a lagging replica
+    replica_set.mark_write(session.info.get("client_identity"))
@@ -1,16 +1,32 @@
 #app/main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 import os
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from app.database.session import Base, engine, SessionLocal
+from app.database.session import (
+    Base,
+    engine,
+    SessionLocal,
+    replica_set,
+    REPLICA_HEALTH_INTERVAL_SECONDS,
+)
 from app.database.models import User
+from app.database.migrate import verify_schema_version
+import app.database.appointment_rollup  # noqa: F401  (keeps the stats rollup in step)
 from app.auth.routes import router as auth_router
 from fastapi.middleware.cors import CORSMiddleware
 from app.utils.logger import setup_logger
 from app.routers.routers import router as api_router
 from app.routers import doctorD
+from app.routers.appointments import router as appointments_router
+from app.routers.metrics import router as metrics_router
+from app.auth.hashing_pool import password_hasher
+from app.auth.revocation import revocation_store, REVOCATION_SWEEP_INTERVAL_SECONDS
+from app.auth.reset_tokens import sweep_expired_reset_tokens, RESET_TOKEN_SWEEP_INTERVAL_SECONDS
+from app.utils.sweeper import sweeper
+from app.utils.chat_writer import chat_writer
+from app.utils.query_stats import start_request, end_request
 from fastapi.staticfiles import StaticFiles
 
 
@@ -33,10 +49,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-Next-Cursor", "X-Has-More"],
 )
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    """Count SQL statements and DB time per request"""
+    stats, token = start_request(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        end_request(token)
+
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = str(stats.total_ms)
+    if stats.count:
+        logger.info(
+            f"{stats.route} status={response.status_code} "
+            f"db_queries={stats.count} db_time_ms={stats.total_ms}"
+            + (f" n_plus_one={len(stats.flagged)}" if stats.flagged else "")
+        )
+    return response
+
+# Schema changes go through `python -m app.database.migrate`; workers only check
+verify_schema_version(engine)
 
 # Newly added - Removed hardcoded admin seeding
 # Users must now register through the signup endpoint
@@ -47,6 +84,42 @@ Base.metadata.create_all(bind=engine)
 app.include_router(auth_router)
 app.include_router(api_router)
 app.include_router(doctorD.router) # Register the Doctor Dashboard Router
+# After doctorD so its literal /api/appointments/requests wins over /api/appointments/{appointment_id}
+app.include_router(appointments_router)
+app.include_router(metrics_router)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    sweeper.register(
+        "revoked-token-sweep",
+        REVOCATION_SWEEP_INTERVAL_SECONDS,
+        revocation_store.sweep,
+    )
+    sweeper.register(
+        "reset-token-sweep",
+        RESET_TOKEN_SWEEP_INTERVAL_SECONDS,
+        sweep_expired_reset_tokens,
+    )
+    if replica_set.replicas:
+        sweeper.register(
+            "replica-health",
+            REPLICA_HEALTH_INTERVAL_SECONDS,
+            lambda: replica_set.check_health(engine),
+        )
+    sweeper.start()
+
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    sweeper.stop()
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def flush_chat_writer():
+    # Started lazily by the first chat message; drain it before exit
+    await chat_writer.stop()
 
 
 @app.get("/")
@@ -1,21 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_
 from datetime import date, datetime
-from typing import List
+from typing import List, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.session import get_db
+from app.database.async_session import get_async_db
+from app.utils import async_telemedicine_utils
 from app.database.models import Appointment, User, Doctor
 from app.schemas.appointment import (
     AppointmentCreate,
     AppointmentUpdate,
     AppointmentResponse,
-    AppointmentStats
+    AppointmentStats,
+    BulkAppointmentRequest,
+    BulkAppointmentResult,
 )
-from app.auth.jwt_handler import get_current_user
+from app.auth.jwt_handler import get_current_user, get_current_user_async
+from app.utils.pagination import keyset_page, MAX_PAGE_SIZE
+from app.database.appointment_rollup import get_appointment_stats as get_rollup_stats
+from app.utils.scheduling import FREE_STATUSES, to_minutes, to_hhmm, validate_slot, reserve_slot
+from app.utils.bulk_booking import book_appointments, expand_recurrence
+from app.utils.schedule_export import appointment_filters, check_format, export_response
 
 router = APIRouter(prefix="/api", tags=["appointments"])
 
+
+# Patient and doctor fetched in the listing query itself
+_WITH_NAMES = (joinedload(Appointment.patient), joinedload(Appointment.doctor))
+
+# Sort key for admin listings; backed by the composite appointment indexes
+_KEYSET_COLUMNS = [Appointment.appointment_date, Appointment.appointment_time, Appointment.id]
+
+# Statuses a patient may set on their own booking; the rest are the clinic's
+PATIENT_STATUSES = ("scheduled", "rescheduled", "cancelled")
+
+
+def _to_response(apt: Appointment, patient_name: str | None = None) -> AppointmentResponse:
+    """Build the response from an appointment whose patient/doctor are loaded"""
+    response = AppointmentResponse.from_orm(apt)
+    if patient_name is None:
+        patient_name = apt.patient.username if apt.patient else (apt.patient_name or "Unknown")
+    response.patient_name = patient_name
+    response.doctor_name = apt.doctor.name if apt.doctor else "Unknown"
+    return response
+
 # ==========================================
 # PATIENT ENDPOINTS
 # ==========================================
@@ -33,17 +63,21 @@ def create_appointment(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
+    # Canonical "HH:MM" so the unique slot index sees one spelling per slot
+    appointment_time = to_hhmm(to_minutes(data.appointment_time))
+    validate_slot(db, data.doctor_id, data.appointment_date, appointment_time)
+    
     # Create appointment
     appointment = Appointment(
         patient_id=current_user.id,
         doctor_id=data.doctor_id,
         appointment_date=data.appointment_date,
-        appointment_time=data.appointment_time,
+        appointment_time=appointment_time,
         reason=data.reason,
         status="scheduled"
     )
     
-    db.add(appointment)
+    reserve_slot(db, appointment)
     db.commit()
     db.refresh(appointment)
     
@@ -55,29 +89,39 @@ def create_appointment(
     return response
 
 
-@router.get("/appointments", response_model=List[AppointmentResponse])
-def get_my_appointments(
+@router.post("/appointments/bulk", response_model=BulkAppointmentResult)
+def create_appointments_bulk(
+    data: BulkAppointmentRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all appointments for the current user"""
+    """
+    Book a batch and/or a recurring series in one transaction. Admins may
+    set patient_id per item to import appointments for other patients.
+    """
     
-    appointments = db.query(Appointment).filter(
-        Appointment.patient_id == current_user.id
-    ).order_by(Appointment.appointment_date.desc()).all()
+    items = list(data.items)
+    if data.recurrence:
+        items.extend(expand_recurrence(data.recurrence))
     
-    # Enrich with patient and doctor names
-    result = []
-    for apt in appointments:
-        doctor = db.query(Doctor).filter(Doctor.id == apt.doctor_id).first()
-        response = AppointmentResponse.from_orm(apt)
-        response.patient_name = current_user.username
-        response.doctor_name = doctor.name if doctor else "Unknown"
-        result.append(response)
+    result = book_appointments(db, items, data.mode, current_user)
+    db.commit()
     
     return result
 
 
+@router.get("/appointments", response_model=List[AppointmentResponse])
+async def get_my_appointments(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """Get all appointments for the current user"""
+    
+    appointments = await async_telemedicine_utils.get_patient_appointments(db, current_user.id)
+    
+    return [_to_response(apt, patient_name=current_user.username) for apt in appointments]
+
+
 @router.get("/appointments/{appointment_id}", response_model=AppointmentResponse)
 def get_appointment(
     appointment_id: int,
@@ -86,7 +130,9 @@ def get_appointment(
 ):
     """Get a specific appointment"""
     
-    appointment = db.query(Appointment).filter(
+    appointment = db.query(Appointment).options(
+        joinedload(Appointment.doctor)
+    ).filter(
         Appointment.id == appointment_id,
         Appointment.patient_id == current_user.id
     ).first()
@@ -94,12 +140,7 @@ def get_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
-    doctor = db.query(Doctor).filter(Doctor.id == appointment.doctor_id).first()
-    response = AppointmentResponse.from_orm(appointment)
-    response.patient_name = current_user.username
-    response.doctor_name = doctor.name if doctor else "Unknown"
-    
-    return response
+    return _to_response(appointment, patient_name=current_user.username)
 
 
 @router.patch("/appointments/{appointment_id}", response_model=AppointmentResponse)
@@ -119,23 +160,31 @@ def update_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    if data.status not in PATIENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(PATIENT_STATUSES)}")
+    
     # Update fields
-    if data.status:
-        appointment.status = data.status
+    was_free = appointment.status in FREE_STATUSES
+    appointment.status = data.status
     if data.appointment_date:
         appointment.appointment_date = data.appointment_date
     if data.appointment_time:
-        appointment.appointment_time = data.appointment_time
+        appointment.appointment_time = to_hhmm(to_minutes(data.appointment_time))
+    
+    # A moved booking, or a cancelled one brought back, claims its slot again
+    moved = data.appointment_date or data.appointment_time
+    if appointment.status not in FREE_STATUSES and (moved or was_free):
+        validate_slot(db, appointment.doctor_id, appointment.appointment_date, appointment.appointment_time)
+        reserve_slot(db, appointment)
     
     db.commit()
-    db.refresh(appointment)
     
-    doctor = db.query(Doctor).filter(Doctor.id == appointment.doctor_id).first()
-    response = AppointmentResponse.from_orm(appointment)
-    response.patient_name = current_user.username
-    response.doctor_name = doctor.name if doctor else "Unknown"
+    # Reload the row and its doctor in one statement
+    appointment = db.query(Appointment).options(
+        joinedload(Appointment.doctor)
+    ).filter(Appointment.id == appointment_id).populate_existing().one()
     
-    return response
+    return _to_response(appointment, patient_name=current_user.username)
 
 
 @router.delete("/appointments/{appointment_id}")
@@ -175,51 +224,32 @@ def get_appointment_stats(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    today = date.today()
-    
-    # Today's appointments (all statuses)
-    total_today = db.query(Appointment).filter(
-        Appointment.appointment_date == today
-    ).count()
-    
-    # Upcoming appointments (scheduled, future dates)
-    upcoming = db.query(Appointment).filter(
-        and_(
-            Appointment.appointment_date > today,
-            Appointment.status == "scheduled"
-        )
-    ).count()
-    
-    # Completed appointments
-    completed = db.query(Appointment).filter(
-        Appointment.status == "completed"
-    ).count()
-    
-    # Cancelled appointments
-    cancelled = db.query(Appointment).filter(
-        Appointment.status == "cancelled"
-    ).count()
+    # One grouped read of the per-date/per-status rollup
+    return AppointmentStats(**get_rollup_stats(db, date.today()))
+
+
+@router.get("/admin/appointments/export.{fmt}")
+def export_appointments(
+    fmt: str,
+    request: Request,
+    doctor_id: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    status: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream an appointment sheet as CSV or iCalendar (admin only)"""
     
-    # Rescheduled appointments
-    rescheduled = db.query(Appointment).filter(
-        Appointment.status == "rescheduled"
-    ).count()
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    # Today's scheduled appointments
-    today_scheduled = db.query(Appointment).filter(
-        and_(
-            Appointment.appointment_date == today,
-            Appointment.status == "scheduled"
-        )
-    ).count()
-    
-    return AppointmentStats(
-        today=today_scheduled,
-        upcoming=upcoming,
-        completed=completed,
-        cancelled=cancelled,
-        rescheduled=rescheduled,
-        total_today=total_today
+    check_format(fmt)
+    return export_response(
+        request,
+        fmt,
+        appointment_filters(doctor_id, date_from, date_to, status),
+        filename=f"appointments-{date_from or 'all'}-{date_to or 'all'}",
+        etag_key=f"admin|{doctor_id}|{date_from}|{date_to}|{status}",
     )
 
 
@@ -234,80 +264,73 @@ def get_today_appointments(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     today = date.today()
-    appointments = db.query(Appointment).filter(
+    appointments = db.query(Appointment).options(*_WITH_NAMES).filter(
         Appointment.appointment_date == today
     ).order_by(Appointment.appointment_time).all()
     
-    # Enrich with patient and doctor names
-    result = []
-    for apt in appointments:
-        patient = db.query(User).filter(User.id == apt.patient_id).first()
-        doctor = db.query(Doctor).filter(Doctor.id == apt.doctor_id).first()
-        
-        response = AppointmentResponse.from_orm(apt)
-        response.patient_name = patient.username if patient else "Unknown"
-        response.doctor_name = doctor.name if doctor else "Unknown"
-        result.append(response)
-    
-    return result
+    return [_to_response(apt) for apt in appointments]
 
 
 @router.get("/admin/appointments/upcoming", response_model=List[AppointmentResponse])
 def get_upcoming_appointments(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    doctor_id: Optional[int] = Query(None),
+    status: str = Query("scheduled"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all upcoming appointments (admin only)"""
+    """Get upcoming appointments, one keyset page at a time (admin only)"""
     
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
     today = date.today()
-    appointments = db.query(Appointment).filter(
+    query = db.query(Appointment).options(*_WITH_NAMES).filter(
         and_(
             Appointment.appointment_date > today,
-            Appointment.status == "scheduled"
+            Appointment.status == status
         )
-    ).order_by(Appointment.appointment_date, Appointment.appointment_time).all()
-    
-    # Enrich with patient and doctor names
-    result = []
-    for apt in appointments:
-        patient = db.query(User).filter(User.id == apt.patient_id).first()
-        doctor = db.query(Doctor).filter(Doctor.id == apt.doctor_id).first()
-        
-        response = AppointmentResponse.from_orm(apt)
-        response.patient_name = patient.username if patient else "Unknown"
-        response.doctor_name = doctor.name if doctor else "Unknown"
-        result.append(response)
+    )
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
     
-    return result
+    appointments, next_cursor = keyset_page(query, _KEYSET_COLUMNS, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [_to_response(apt) for apt in appointments]
 
 
 @router.get("/admin/appointments/past", response_model=List[AppointmentResponse])
 def get_past_appointments(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    doctor_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all past appointments (admin only)"""
+    """Get past appointments, newest first, one keyset page at a time (admin only)"""
     
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
     today = date.today()
-    appointments = db.query(Appointment).filter(
+    query = db.query(Appointment).options(*_WITH_NAMES).filter(
         Appointment.appointment_date < today
-    ).order_by(Appointment.appointment_date.desc()).all()
-    
-    # Enrich with patient and doctor names
-    result = []
-    for apt in appointments:
-        patient = db.query(User).filter(User.id == apt.patient_id).first()
-        doctor = db.query(Doctor).filter(Doctor.id == apt.doctor_id).first()
-        
-        response = AppointmentResponse.from_orm(apt)
-        response.patient_name = patient.username if patient else "Unknown"
-        response.doctor_name = doctor.name if doctor else "Unknown"
-        result.append(response)
+    )
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    if status:
+        query = query.filter(Appointment.status == status)
     
-    return result
+    appointments, next_cursor = keyset_page(
+        query, _KEYSET_COLUMNS, cursor, limit, descending=True
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    return [_to_response(apt) for apt in appointments]
@@ -1,11 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request as FastAPIRequest, Response, WebSocket, WebSocketDisconnect
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.session import get_db
-from app.database.doctorD import Appointment, Request, DoctorSettings, ChatMessage
-from app.schemas.doctorD import AppointmentSchema, RequestSchema, StatusUpdate,ChatMessageCreate, ChatMessageOut,CombinedRecordsSchema
+from app.database.async_session import get_async_db
+from app.utils import async_telemedicine_utils
+from app.utils.schedule_export import appointment_filters, check_format, etag_matches, export_response
+from app.utils.chat_broker import chat_broker, conversation_topic
+from app.utils.chat_writer import chat_writer
+from app.database.models import Appointment, User
+from app.auth.jwt_handler import get_current_user
+from fastapi.encoders import jsonable_encoder
+from app.database import fulltext
+from app.database.doctorD import Request, DoctorSettings, ChatMessage
+from app.schemas.doctorD import AppointmentSchema, RequestSchema, StatusUpdate,ChatMessageCreate, ChatMessageOut,CombinedRecordsSchema, SearchHit
+from app.schemas.doctorD import DoctorDashboardSchema, LiveConsultationSchema, DashboardStatsSchema
 
 
 
@@ -16,20 +32,167 @@ router = APIRouter(
     tags=["Doctor Dashboard"]
 )
 
-# API 1: Get Today's Schedule DONE
-@router.get("/appointments", response_model=List[AppointmentSchema])
-def get_appointments(db: Session = Depends(get_db)):
-    return db.query(Appointment).filter(Appointment.date == "today").all()
+logger = logging.getLogger("my_app")
+
+MAX_SCHEDULE_DAYS = 62
+DASHBOARD_PENDING_REQUESTS = 50
+
+CHAT_SENDERS = ("doctor", "patient")
+CHAT_MAX_MESSAGE_LENGTH = 4000
+CHAT_HISTORY_PAGE_SIZE = 100
+CHAT_HISTORY_MAX_PAGE_SIZE = 500
+
+
+def _to_schedule_item(apt: Appointment) -> AppointmentSchema:
+    """Dashboard row for an appointment whose patient is loaded"""
+    return AppointmentSchema(
+        id=apt.id,
+        doctor_id=apt.doctor_id,
+        patient_name=apt.patient.username if apt.patient else (apt.patient_name or "Unknown"),
+        time_slot=apt.appointment_time,
+        type=apt.type,
+        status=apt.status,
+        date=apt.appointment_date,
+    )
+
+
+# API 1: Get Schedule for a date range (defaults to today) DONE
+@router.get("/doctor/appointments", response_model=List[AppointmentSchema])
+def get_appointments(
+    doctor_id: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Appointments between 'from' and 'to' (inclusive, both default to today).
+    Served by the (doctor_id, appointment_date, status) index.
+    """
+    start = date_from or date.today()
+    end = date_to or start
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days + 1 > MAX_SCHEDULE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Schedule range is limited to {MAX_SCHEDULE_DAYS} days")
+
+    query = db.query(Appointment).options(joinedload(Appointment.patient)).filter(
+        Appointment.appointment_date >= start,
+        Appointment.appointment_date <= end,
+    )
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    if status:
+        query = query.filter(Appointment.status == status)
+
+    appointments = query.order_by(
+        Appointment.appointment_date, Appointment.appointment_time, Appointment.id
+    ).all()
+    return [_to_schedule_item(apt) for apt in appointments]
+
+
+# Calendar clients poll the .ics URL (with the bearer token); the ETag lets them skip unchanged polls
+@router.get("/doctor/appointments/export.{fmt}")
+def export_appointments(
+    fmt: str,
+    request: FastAPIRequest,
+    doctor_id: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    status: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the schedule as CSV or iCalendar, any range size (admin only)"""
+    # Doctors have no login of their own yet, so there is no caller to scope
+    # doctor_id to; every patient's schedule is in here
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    check_format(fmt)
+    return export_response(
+        request,
+        fmt,
+        appointment_filters(doctor_id, date_from, date_to, status),
+        filename=f"schedule-{doctor_id or 'all'}",
+        etag_key=f"doctor|{doctor_id}|{date_from}|{date_to}|{status}",
+        calendar_name="Doctor schedule",
+    )
 
 
 @router.get("/allappointments", response_model=List[AppointmentSchema])
-def get_appointments(db: Session = Depends(get_db)):
+def get_all_appointments(db: Session = Depends(get_db)):
     """
     Fetch all appointments. 
     The frontend (React) will handle filtering for 'Today' or 'This Week'.
     """
-    appointments = db.query(Appointment).all()
-    return appointments
+    appointments = db.query(Appointment).options(joinedload(Appointment.patient)).all()
+    return [_to_schedule_item(apt) for apt in appointments]
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored naive-UTC -> aware, so clients do not read it as local time"""
+    return value.replace(tzinfo=timezone.utc) if value else None
+
+
+# API 1b: Everything the doctor dashboard shows, in one round trip
+@router.get("/doctor/dashboard", response_model=DoctorDashboardSchema)
+def get_doctor_dashboard(
+    request: FastAPIRequest,
+    doctor_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Today's schedule, pending requests, live consultation and stats in two
+    queries (schedule with patients joined, pending requests); the live
+    consultation and counts are derived from those rows. 304 when the
+    client's ETag still matches.
+    """
+    today = date.today()
+    query = db.query(Appointment).options(joinedload(Appointment.patient)).filter(
+        Appointment.appointment_date == today
+    )
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    appointments = query.order_by(Appointment.appointment_time, Appointment.id).all()
+    
+    # Requests are not tied to a doctor yet; show the oldest few, count them all
+    rows = (
+        db.query(Request, func.count().over())
+        .filter(Request.status == "pending")
+        .order_by(Request.id)
+        .limit(DASHBOARD_PENDING_REQUESTS)
+        .all()
+    )
+    pending = [req for req, _ in rows]
+    pending_total = rows[0][1] if rows else 0
+    
+    live = next((apt for apt in appointments if apt.status == "in_progress"), None)
+    payload = DoctorDashboardSchema(
+        date=today,
+        schedule=[_to_schedule_item(apt) for apt in appointments],
+        pending_requests=[RequestSchema.from_orm(req) for req in pending],
+        live_consultation=LiveConsultationSchema(
+            active=True,
+            appointment_id=live.id,
+            patient_name=live.patient.username if live.patient else live.patient_name,
+            type=live.type,
+            tags=["Migraine History"],
+            timer_start=_utc(live.started_at),
+        ) if live else LiveConsultationSchema(active=False),
+        stats=DashboardStatsSchema(
+            requests_count=pending_total,
+            appointments_today=len(appointments),
+            patients_today=len({apt.patient_id or apt.patient_name for apt in appointments}),
+        ),
+    )
+    
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), sort_keys=True)
+    etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 # API 2: Get Pending Requests DONE
 @router.get("/requests", response_model=List[RequestSchema])
@@ -39,14 +202,17 @@ def get_requests(db: Session = Depends(get_db)):
 # API 3: Get Live Consultation Data DONE
 @router.get("/consultation/live")
 def get_live_consultation(db: Session = Depends(get_db)):
-    current = db.query(Appointment).filter(Appointment.status == "In Progress").first()
+    current = db.query(Appointment).options(joinedload(Appointment.patient)).filter(
+        Appointment.appointment_date == date.today(),
+        Appointment.status == "in_progress",
+    ).first()
     if current:
         return {
             "active": True,
-            "patient_name": current.patient_name,
+            "patient_name": current.patient.username if current.patient else current.patient_name,
             "type": current.type,
             "tags": ["Migraine History"],
-            "timer_start": datetime.now().isoformat()
+            "timer_start": _utc(current.started_at)
         }
     return {"active": False}
 
@@ -92,28 +258,127 @@ def handle_request(request_id: int, action: str, db: Session = Depends(get_db)):
 
 # API 7: Get Chat History for a specific patient  DONE
 @router.get("/chat/history/{patient_id}", response_model=List[ChatMessageOut])
-def get_chat_history(patient_id: int, db: Session = Depends(get_db)):
-    messages = db.query(ChatMessage).filter(ChatMessage.patient_id == patient_id).all()
+async def get_chat_history(
+    patient_id: int,
+    response: Response,
+    before_id: Optional[int] = Query(None, description="Older messages: id of the first message held"),
+    after_id: Optional[int] = Query(None, description="Newer messages: id of the last message seen"),
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=CHAT_HISTORY_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    A page of the conversation, oldest first. Without cursors it is the
+    latest page; X-Has-More says whether more exist in that direction.
+    """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="Use either before_id or after_id, not both")
+    
+    messages, has_more = await async_telemedicine_utils.get_chat_history(
+        db, patient_id, limit, before_id=before_id, after_id=after_id
+    )
+    response.headers["X-Has-More"] = "true" if has_more else "false"
     return messages
 
 
+# API 7b: Full-text search over chat messages and request issues
+@router.get("/search", response_model=List[SearchHit])
+def search_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: str = Query("all", description="all, chat or requests"),
+    patient_id: Optional[int] = Query(None, description="Only this patient's chat"),
+    patient_name: Optional[str] = Query(None, description="Only this patient's requests"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ranked matches with highlighted snippets (admin only)"""
+    # Same rule as the schedule export: every patient's messages are in here
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return fulltext.search(db, q, scope, patient_id=patient_id, patient_name=patient_name, limit=limit)
+
+
 # API 8 : Send/Save a new message DONE
 @router.post("/chat/send", response_model=ChatMessageOut)
-def send_message(msg: ChatMessageCreate, db: Session = Depends(get_db)):
-    new_msg = ChatMessage(
-        patient_id=msg.patientId,
-        sender=msg.sender,
-        text=msg.text,
-        timestamp=datetime.utcnow()
-    )
+async def send_message(msg: ChatMessageCreate):
+    # Group-committed with other senders; returns once the row is stored
+    new_msg = await chat_writer.submit(msg.patientId, msg.sender, msg.text)
     
-    db.add(new_msg)
-    db.commit()
-    db.refresh(new_msg)
+    # Live sockets on this conversation see HTTP-sent messages too
+    await chat_broker.publish(conversation_topic(msg.patientId), _message_event(new_msg))
     
     return new_msg
 
 
+def _message_event(msg: ChatMessage) -> dict:
+    return {
+        "id": msg.id,
+        "patient_id": msg.patient_id,
+        "sender": msg.sender,
+        "text": msg.text,
+        "timestamp": msg.timestamp.isoformat() if msg.timestamp else None,
+    }
+
+
+# API 8b: Live conversation over WebSocket
+@router.websocket("/chat/ws/{patient_id}")
+async def chat_socket(websocket: WebSocket, patient_id: int):
+    """
+    Client frames: {"sender": "doctor" | "patient", "text": "..."}.
+    Every socket on the conversation, the sender included, receives the
+    stored message with its id. A client too slow to keep up is closed
+    with 1013 and should re-fetch history before reconnecting.
+    """
+    await websocket.accept()
+    subscription = await chat_broker.subscribe(conversation_topic(patient_id))
+    send_lock = asyncio.Lock()
+
+    async def send(payload: dict):
+        async with send_lock:
+            await websocket.send_json(payload)
+
+    async def receive():
+        while True:
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                data = None
+            sender = data.get("sender") if isinstance(data, dict) else None
+            text = data.get("text") if isinstance(data, dict) else None
+            if sender not in CHAT_SENDERS or not isinstance(text, str) or not text.strip():
+                await send({"error": "Expected {\"sender\": \"doctor\"|\"patient\", \"text\": \"...\"}"})
+                continue
+            if len(text) > CHAT_MAX_MESSAGE_LENGTH:
+                await send({"error": f"Messages are limited to {CHAT_MAX_MESSAGE_LENGTH} characters"})
+                continue
+
+            message = await chat_writer.submit(patient_id, sender, text)
+            await chat_broker.publish(conversation_topic(patient_id), _message_event(message))
+
+    async def deliver():
+        while True:
+            await send(await subscription.get())
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(deliver())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await chat_broker.unsubscribe(subscription)
+
+    error = next(iter(done)).exception()
+    if isinstance(error, WebSocketDisconnect):
+        return
+    if isinstance(error, ConnectionResetError):
+        await websocket.close(code=1013)  # try again later
+        return
+    if error is not None:
+        logger.error(f"Chat socket for patient {patient_id} failed: {error!r}")
+        await websocket.close(code=1011)
+
+
 from app.schemas.doctorD import RequestSchema
 
 
@@ -155,7 +420,10 @@ def get_all_records(db: Session = Depends(get_db)):
     """
     
     # 1. Get ALL Appointments
-    all_appointments = db.query(Appointment).all()
+    all_appointments = [
+        _to_schedule_item(apt)
+        for apt in db.query(Appointment).options(joinedload(Appointment.patient)).all()
+    ]
     
     # 2. Get Requests where status is NOT "pending"
     # We use the != operator which SQLAlchemy translates to SQL '!='
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth.jwt_handler import get_current_user
+from app.database.models import User
+from app.database.pool_metrics import pool_stats
+from app.database.session import replica_set
+from app.utils.slow_query import statement_timings, SLOW_QUERY_THRESHOLD_MS
+from app.utils.chat_broker import chat_broker
+from app.utils.chat_writer import chat_writer
+
+router = APIRouter(
+    prefix="/api/admin/metrics",
+    tags=["Metrics"]
+)
+
+
+def require_admin(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
+# -------------------------------------------------
+# Connection Pool
+# -------------------------------------------------
+@router.get("/pool")
+def get_pool_metrics(admin: User = Depends(require_admin)):
+    """Checked-out connections, pool waits and connection lifetimes per engine"""
+    return pool_stats()
+
+
+# -------------------------------------------------
+# Read Replicas
+# -------------------------------------------------
+@router.get("/replicas")
+def get_replica_status(admin: User = Depends(require_admin)):
+    """Health, lag and ejection reason for each configured read replica"""
+    return replica_set.status()
+
+
+# -------------------------------------------------
+# Statement Timings
+# -------------------------------------------------
+@router.get("/queries")
+def get_top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    admin: User = Depends(require_admin),
+):
+    """Top statements by cumulative execution time since startup"""
+    return {
+        "slow_threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "untracked_fingerprints": statement_timings.dropped,
+        "statements": statement_timings.top(limit),
+    }
+
+
+# -------------------------------------------------
+# Live Chat
+# -------------------------------------------------
+@router.get("/chat")
+async def get_chat_stats(admin: User = Depends(require_admin)):
+    """Broker fan-out and backpressure, and the group-commit writer's batching"""
+    # async: these counters belong to the event loop
+    return {"broker": chat_broker.stats(), "writer": chat_writer.stats()}
@@ -1,27 +1,33 @@
 # Routers registration placeholder 
 from fastapi import APIRouter, Depends, Query, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import exists
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.session import get_db
-from app.auth.jwt_handler import get_current_user
-from app.database.models import FamilyMember,Patient,Booking,Payment
+from app.database.async_session import get_async_db
+from app.auth.jwt_handler import get_current_user, get_current_user_async
+from app.utils import async_telemedicine_utils
+from app.database.models import FamilyMember,Patient,Booking,Payment,Doctor
 
 
 import os
 import shutil
 from enum import Enum
 from typing import List
+from datetime import date, timedelta
 from fastapi import Form
 
 
 from app.utils.telemedicine_utils import (
-    search_doctors,
+    resolve_specialization,
     get_config_by_type,
     add_family_member,
     get_family_members,
 )
 
 from app.schemas.doctor import DoctorResponse
+from app.schemas.availability import DoctorAvailability, EarliestAvailableDoctor
+from app.utils.scheduling import get_availability, find_earliest_available
 from app.schemas.config import ConfigResponse
 from app.schemas.family import FamilyCreate, FamilyResponse
 from app.schemas.health_report import HealthReportResponse
@@ -32,11 +38,9 @@ from app.schemas.patient import DashboardStats,PatientDashboardView
 
 from app.schemas.notification import NotificationResponse
 from app.utils.telemedicine_utils import (
-    get_user_notifications,
     mark_notification_read,
     mark_all_notifications_read,
 )
-from datetime import date
 from app.schemas.earnings import PaymentResponse, EarningsSummaryResponse
 from app.utils.telemedicine_utils import (
     get_doctor_payments,
@@ -54,12 +58,79 @@ router = APIRouter(
 # Doctor Search
 # -------------------------------------------------
 @router.get("/doctors/search", response_model=list[DoctorResponse])
-def doctor_search(
+async def doctor_search(
     name: str | None = Query(None),
     specialization: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await async_telemedicine_utils.search_doctors(db, name, specialization)
+
+# -------------------------------------------------
+# Doctor Availability
+# -------------------------------------------------
+@router.get("/doctors/availability", response_model=list[DoctorAvailability])
+def doctors_availability(
+    doctor_ids: list[int] = Query(..., description="Repeat for each doctor"),
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+):
+    doctor_ids = list(dict.fromkeys(doctor_ids))
+    known = set(db.execute(select(Doctor.id).where(Doctor.id.in_(doctor_ids))).scalars())
+    unknown = [doctor_id for doctor_id in doctor_ids if doctor_id not in known]
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Doctor not found: {', '.join(map(str, unknown))}",
+        )
+
+    availability = get_availability(db, doctor_ids, from_date, to_date)
+    return [
+        {"doctor_id": doctor_id, "days": days}
+        for doctor_id, days in availability.items()
+    ]
+
+
+@router.get("/doctors/earliest-available", response_model=list[EarliestAvailableDoctor])
+def earliest_available_doctors(
+    specialization: str = Query(...),
+    from_date: date | None = Query(None, alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    max_fee: int | None = Query(None),
+    min_experience: int | None = Query(None),
+    limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
 ):
-    return search_doctors(db, name, specialization)
+    """Doctors of a specialization ranked by their earliest free slot"""
+    spec_code = resolve_specialization(db, specialization)
+    if spec_code is None:
+        return []
+
+    start = from_date or date.today()
+    end = to_date or start + timedelta(days=13)
+
+    filters = [Doctor.specialization == spec_code]
+    if max_fee is not None:
+        filters.append(Doctor.consultation_fee <= max_fee)
+    if min_experience is not None:
+        filters.append(Doctor.experience >= min_experience)
+
+    return find_earliest_available(db, filters, start, end, limit)
+
+
+@router.get("/doctors/{doctor_id}/availability", response_model=DoctorAvailability)
+def doctor_availability(
+    doctor_id: int,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+):
+    from app.utils.telemedicine_utils import get_doctor_by_id
+    get_doctor_by_id(db, doctor_id)
+
+    availability = get_availability(db, [doctor_id], from_date, to_date)
+    return {"doctor_id": doctor_id, "days": availability[doctor_id]}
+
 
 # -------------------------------------------------
 # Doctor Details (After Click)
@@ -273,11 +344,11 @@ def seed_data(db: Session = Depends(get_db)):
     "/doctor/notifications",
     response_model=list[NotificationResponse]
 )
-def list_notifications(
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
+async def list_notifications(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user_async),
 ):
-    return get_user_notifications(db, user.id)
+    return await async_telemedicine_utils.get_user_notifications(db, user.id)
 
 
 
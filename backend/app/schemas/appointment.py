@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 class AppointmentCreate(BaseModel):
     doctor_id: int
@@ -15,11 +15,12 @@ class AppointmentUpdate(BaseModel):
 
 class AppointmentResponse(BaseModel):
     id: int
-    patient_id: int
+    patient_id: Optional[int]
     doctor_id: int
     appointment_date: date
     appointment_time: str
     status: str
+    type: Optional[str] = None
     reason: Optional[str]
     created_at: datetime
     updated_at: datetime
@@ -38,3 +39,37 @@ class AppointmentStats(BaseModel):
     cancelled: int
     rescheduled: int
     total_today: int
+
+class RecurrenceRule(BaseModel):
+    doctor_id: int
+    start_date: date
+    appointment_time: str  # Format: "HH:MM"
+    frequency: str = "weekly"  # daily, weekly
+    interval: int = 1
+    count: Optional[int] = None  # number of occurrences
+    until: Optional[date] = None  # inclusive end date
+    reason: Optional[str] = None
+
+class BulkAppointmentItem(BaseModel):
+    doctor_id: int
+    appointment_date: date
+    appointment_time: str  # Format: "HH:MM"
+    reason: Optional[str] = None
+    patient_id: Optional[int] = None  # admin imports only; defaults to the caller
+
+class BulkAppointmentRequest(BaseModel):
+    items: List[BulkAppointmentItem] = []
+    recurrence: Optional[RecurrenceRule] = None
+    mode: str = "all_or_nothing"  # all_or_nothing, per_item
+
+class BulkAppointmentItemResult(BaseModel):
+    index: int
+    status: str  # created, error, skipped
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkAppointmentResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: List[BulkAppointmentItemResult]
@@ -20,3 +20,17 @@ class UserPublic(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BulkImportRowResult(BaseModel):
+    row: int
+    username: str | None = None
+    status: str  # created, skipped, error
+    id: int | None = None
+    error: str | None = None
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    elapsed_seconds: float
+    results: list[BulkImportRowResult]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import date
+
+from app.schemas.doctor import DoctorResponse
+
+class DayAvailability(BaseModel):
+    date: date
+    slots: list[str]  # free slot start times, "HH:MM"
+
+class DoctorAvailability(BaseModel):
+    doctor_id: int
+    days: list[DayAvailability]
+
+class EarliestAvailableDoctor(BaseModel):
+    doctor: DoctorResponse
+    date: date
+    time: str  # "HH:MM"
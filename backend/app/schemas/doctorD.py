@@ -1,16 +1,17 @@
 #  Telemedicine/backend/app/schemas/doctorD.py
 
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 
 class AppointmentSchema(BaseModel):
     id: int
+    doctor_id: int
     patient_name: str
-    time_slot: str
-    type: str
+    time_slot: str  # "HH:MM"
+    type: Optional[str] = None
     status: str
-    date: str  # <--- NEW: Added this field
+    date: date
 
     class Config:
         # Use 'from_attributes = True' if you are on Pydantic v2
@@ -25,7 +26,7 @@ class RequestSchema(BaseModel):
     issue: str
     time: str
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 class StatusUpdate(BaseModel):
     is_online: bool
@@ -51,4 +52,37 @@ class ChatMessageOut(BaseModel):
 
 class CombinedRecordsSchema(BaseModel):
     appointments: List[AppointmentSchema]
-    request_history: List[RequestSchema]
\ No newline at end of file
+    request_history: List[RequestSchema]
+
+class SearchHit(BaseModel):
+    source: str  # chat, request
+    id: int
+    patient_id: Optional[int] = None
+    patient_name: Optional[str] = None
+    sender: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    snippet: str  # HTML: escaped text, matched terms wrapped in <mark>
+    rank: Optional[float] = None  # bm25, lower is better; None when too common to rank (newest first)
+
+
+class LiveConsultationSchema(BaseModel):
+    active: bool
+    appointment_id: Optional[int] = None
+    patient_name: Optional[str] = None
+    type: Optional[str] = None
+    tags: List[str] = []
+    timer_start: Optional[datetime] = None  # UTC
+
+
+class DashboardStatsSchema(BaseModel):
+    requests_count: int
+    appointments_today: int
+    patients_today: int  # distinct patients on today's schedule
+
+
+class DoctorDashboardSchema(BaseModel):
+    date: date
+    schedule: List[AppointmentSchema]
+    pending_requests: List[RequestSchema]
+    live_consultation: LiveConsultationSchema
+    stats: DashboardStatsSchema
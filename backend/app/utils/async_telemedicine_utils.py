@@ -0,0 +1,102 @@
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.database.models import Doctor, ConfigMaster, Notification, Appointment
+from app.database.doctorD import ChatMessage
+
+# Async counterparts of the read helpers in telemedicine_utils, for routes
+# served directly from the event loop via get_async_db.
+
+# ---------------- Doctor Search ----------------
+async def search_doctors(
+    db: AsyncSession,
+    name: str | None = None,
+    specialization: str | None = None
+):
+    query = select(Doctor)
+
+    if name:
+        query = query.where(Doctor.name.ilike(f"%{name}%"))
+
+    if specialization:
+        spec = specialization.strip().lower()
+
+        config = (
+            await db.execute(
+                select(ConfigMaster)
+                .where(ConfigMaster.config_type == "SPECIALIZATION")
+                .where(
+                    or_(
+                        ConfigMaster.code.ilike(f"%{spec}%"),
+                        ConfigMaster.value.ilike(f"%{spec}%")
+                    )
+                )
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+
+        if not config:
+            return []  # no matching specialization
+
+        query = query.where(Doctor.specialization == config.code)
+
+    return (await db.execute(query)).scalars().all()
+
+
+# ---------------- Notifications ----------------
+async def get_user_notifications(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(Notification)
+        .where(Notification.user_id == user_id)
+        .order_by(Notification.created_at.desc())
+    )
+    return result.scalars().all()
+
+
+# ---------------- Chat ----------------
+async def get_chat_history(
+    db: AsyncSession,
+    patient_id: int,
+    limit: int,
+    before_id: int | None = None,
+    after_id: int | None = None,
+):
+    """
+    One page of a conversation in id order, as (messages, has_more).
+    after_id gives the messages following it (a client's delta since its
+    last seen message), before_id the ones preceding it, neither the latest
+    page. Each is a range scan on ix_chat_messages_patient_id_id.
+
+    Ids, not timestamps, are the cursor: a timestamp is taken when a
+    message is submitted but the id when its batch commits, so a message
+    can be stored after one with a later timestamp and a (timestamp, id)
+    delta would skip it.
+    """
+    query = select(ChatMessage).where(ChatMessage.patient_id == patient_id)
+
+    if after_id is not None:
+        query = query.where(ChatMessage.id > after_id).order_by(ChatMessage.id)
+    else:
+        if before_id is not None:
+            query = query.where(ChatMessage.id < before_id)
+        query = query.order_by(ChatMessage.id.desc())
+
+    messages = (await db.execute(query.limit(limit + 1))).scalars().all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if after_id is None:
+        messages.reverse()
+    return messages, has_more
+
+
+# ---------------- Appointments ----------------
+async def get_patient_appointments(db: AsyncSession, patient_id: int):
+    """Newest first, with the doctor joined in the same query."""
+    result = await db.execute(
+        select(Appointment)
+        .options(joinedload(Appointment.doctor))
+        .where(Appointment.patient_id == patient_id)
+        .order_by(Appointment.appointment_date.desc())
+    )
+    return result.scalars().all()
@@ -0,0 +1,235 @@
+"""
+Bulk and recurring appointment booking.
+
+A batch is validated with a fixed number of queries whatever its size -
+doctors and patients by IN, working hours from template_index, existing
+bookings by one range scan - then inserted in one transaction with
+multi-row INSERT ... RETURNING statements, so the unique slot index sees
+every row. The ORM would insert row by row here (SQLite cannot order
+RETURNING rows), so the rollup deltas are applied explicitly.
+
+Modes:
+    all_or_nothing  any invalid item rejects the whole batch, nothing is written
+    per_item        valid items are booked, invalid ones are reported
+"""
+import os
+from collections import Counter
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database.appointment_rollup import apply_counts
+from app.database.models import Appointment, Doctor, User
+from app.schemas.appointment import BulkAppointmentItem, RecurrenceRule
+from app.utils.scheduling import has_started, load_booked, slot_in_template, template_index, to_hhmm, to_minutes
+
+load_dotenv()
+
+BULK_BOOKING_MAX_ITEMS = int(os.getenv("BULK_BOOKING_MAX_ITEMS", "10000"))
+# Keeps IN lists well below the database's bound-parameter limit
+BULK_BOOKING_IN_CHUNK = int(os.getenv("BULK_BOOKING_IN_CHUNK", "500"))
+
+MODES = ("all_or_nothing", "per_item")
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7}
+
+
+def _chunks(values: list, size: int):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ---------------- Recurrence ----------------
+def expand_recurrence(rule: RecurrenceRule) -> list[BulkAppointmentItem]:
+    """One item per occurrence of ``rule``, bounded by count and/or until."""
+    step_days = FREQUENCY_DAYS.get(rule.frequency.lower())
+    if step_days is None:
+        raise HTTPException(status_code=400, detail="frequency must be 'daily' or 'weekly'")
+    if rule.interval < 1:
+        raise HTTPException(status_code=400, detail="interval must be at least 1")
+    if rule.count is None and rule.until is None:
+        raise HTTPException(status_code=400, detail="Recurrence needs 'count' or 'until'")
+
+    step = timedelta(days=step_days * rule.interval)
+    items = []
+    day = rule.start_date
+    while (rule.count is None or len(items) < rule.count) and (rule.until is None or day <= rule.until):
+        if len(items) >= BULK_BOOKING_MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Recurrence expands to more than {BULK_BOOKING_MAX_ITEMS} appointments",
+            )
+        items.append(BulkAppointmentItem(
+            doctor_id=rule.doctor_id,
+            appointment_date=day,
+            appointment_time=rule.appointment_time,
+            reason=rule.reason,
+        ))
+        day += step
+    return items
+
+
+# ---------------- Validation ----------------
+def _existing_ids(db: Session, column, ids: list[int]) -> set[int]:
+    found = set()
+    for chunk in _chunks(ids, BULK_BOOKING_IN_CHUNK):
+        found.update(db.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+
+def _booked_slots(db: Session, doctor_ids: list[int], start: date, end: date) -> set:
+    booked = set()
+    for chunk in _chunks(doctor_ids, BULK_BOOKING_IN_CHUNK):
+        for (doctor_id, day), minutes in load_booked(db, chunk, start, end).items():
+            booked.update((doctor_id, day, minute) for minute in minutes)
+    return booked
+
+
+def _validate(db: Session, items: list[BulkAppointmentItem], current_user: User):
+    """(errors by index, [(index, row values)] for the valid items)."""
+    errors = {}
+    candidates = []
+    for index, item in enumerate(items):
+        patient_id = item.patient_id or current_user.id
+        if patient_id != current_user.id and current_user.role != "admin":
+            errors[index] = "Only admins can book for other patients"
+            continue
+        try:
+            minute = to_minutes(item.appointment_time)
+        except HTTPException as exc:
+            errors[index] = exc.detail
+            continue
+        if has_started(item.appointment_date, minute):
+            errors[index] = "Requested time is in the past"
+            continue
+        candidates.append((index, item, patient_id, minute))
+
+    if not candidates:
+        return errors, []
+
+    doctor_ids = sorted({item.doctor_id for _, item, _, _ in candidates})
+    doctors = _existing_ids(db, Doctor.id, doctor_ids)
+    foreign_patients = sorted({p for _, _, p, _ in candidates if p != current_user.id})
+    patients = _existing_ids(db, User.id, foreign_patients) | {current_user.id}
+
+    known_doctors = sorted(doctors)
+    templates = template_index.get(db, known_doctors) if known_doctors else {}
+    booked = _booked_slots(
+        db,
+        known_doctors,
+        min(item.appointment_date for _, item, _, _ in candidates),
+        max(item.appointment_date for _, item, _, _ in candidates),
+    ) if known_doctors else set()
+
+    valid = []
+    claimed = set()
+    for index, item, patient_id, minute in candidates:
+        slot = (item.doctor_id, item.appointment_date, minute)
+        if item.doctor_id not in doctors:
+            errors[index] = "Doctor not found"
+        elif patient_id not in patients:
+            errors[index] = "Patient not found"
+        elif not slot_in_template(templates[item.doctor_id].get(item.appointment_date.weekday()), minute):
+            errors[index] = "Requested time is outside the doctor's working hours"
+        elif slot in booked:
+            errors[index] = "This slot is already booked"
+        elif slot in claimed:
+            errors[index] = "Duplicate slot in this batch"
+        else:
+            claimed.add(slot)
+            valid.append((index, {
+                "patient_id": patient_id,
+                "doctor_id": item.doctor_id,
+                "appointment_date": item.appointment_date,
+                # Canonical "HH:MM" so the unique slot index sees one spelling per slot
+                "appointment_time": to_hhmm(minute),
+                "reason": item.reason,
+                "status": "scheduled",
+            }))
+    return errors, valid
+
+
+# ---------------- Booking ----------------
+def _insert_batch(db: Session, valid: list) -> dict:
+    """index -> new id for every row of ``valid``, or IntegrityError."""
+    rows = db.execute(
+        insert(Appointment).returning(
+            Appointment.id, Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time,
+        ),
+        [values for _, values in valid],
+    ).all()
+    # RETURNING order is unspecified; the slot is unique among live rows
+    ids = {(doctor_id, day, hhmm): appointment_id for appointment_id, doctor_id, day, hhmm in rows}
+    apply_counts(db.connection(), Counter((values["appointment_date"], values["status"]) for _, values in valid))
+    return {
+        index: ids[(values["doctor_id"], values["appointment_date"], values["appointment_time"])]
+        for index, values in valid
+    }
+
+
+def _insert_one_by_one(db: Session, valid: list, errors: dict) -> dict:
+    """Fallback after a concurrent booking broke the batch insert."""
+    ids = {}
+    for index, values in valid:
+        appointment = Appointment(**values)
+        try:
+            with db.begin_nested():
+                db.add(appointment)
+        except IntegrityError:
+            errors[index] = "This slot is already booked"
+        else:
+            ids[index] = appointment.id
+    return ids
+
+
+def book_appointments(
+    db: Session,
+    items: list[BulkAppointmentItem],
+    mode: str,
+    current_user: User,
+) -> dict:
+    """
+    Validate and insert ``items``; the caller commits. Returns a compact
+    report with one entry per item: created (with id), error or skipped.
+    """
+    if mode not in MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(MODES)}")
+    if not items:
+        raise HTTPException(status_code=400, detail="No appointments to book")
+    if len(items) > BULK_BOOKING_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_BOOKING_MAX_ITEMS} appointments per request",
+        )
+
+    errors, valid = _validate(db, items, current_user)
+
+    ids = {}
+    if valid and not (errors and mode == "all_or_nothing"):
+        try:
+            ids = _insert_batch(db, valid)
+        except IntegrityError:
+            # A slot was taken between validation and insert
+            db.rollback()
+            if mode == "all_or_nothing":
+                raise HTTPException(status_code=409, detail="A slot was booked concurrently; nothing was booked")
+            ids = _insert_one_by_one(db, valid, errors)
+
+    results = []
+    for index in range(len(items)):
+        if index in ids:
+            results.append({"index": index, "status": "created", "id": ids[index]})
+        elif index in errors:
+            results.append({"index": index, "status": "error", "error": errors[index]})
+        else:
+            results.append({"index": index, "status": "skipped"})
+
+    return {
+        "total": len(items),
+        "created": len(ids),
+        "failed": len(errors),
+        "results": results,
+    }
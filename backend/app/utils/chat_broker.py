@@ -0,0 +1,133 @@
+"""
+Pub/sub for live chat.
+
+ChatBroker is the interface the WebSocket endpoint talks to; one topic per
+conversation. InMemoryBroker fans out within a single worker process and
+is what tests use. A multi-worker deployment plugs in a broker with the
+same three coroutines (e.g. over Redis pub/sub) and keeps the endpoint.
+
+Every subscriber has a bounded queue. A publisher never waits on a slow
+reader: when a queue is full the subscriber either loses its oldest
+message or is disconnected, per CHAT_OVERFLOW_POLICY. A disconnected
+client reconnects and fetches what it missed from the history endpoint.
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("CHAT_SUBSCRIBER_QUEUE_SIZE", "256"))
+CHAT_OVERFLOW_POLICY = os.getenv("CHAT_OVERFLOW_POLICY", "disconnect")  # disconnect, drop_oldest
+
+OVERFLOW_POLICIES = ("disconnect", "drop_oldest")
+
+
+class Subscription:
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = asyncio.Event()
+        self.dropped = 0
+
+    async def get(self) -> dict:
+        """Next message; raises ConnectionResetError once the subscriber overflowed."""
+        if self.overflowed.is_set():
+            raise ConnectionResetError("subscriber queue overflowed")
+        # A busy reader usually finds a message waiting; skip the two futures
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        getter = asyncio.ensure_future(self.queue.get())
+        overflow = asyncio.ensure_future(self.overflowed.wait())
+        try:
+            done, _ = await asyncio.wait({getter, overflow}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            getter.cancel()
+            overflow.cancel()
+        if getter in done:
+            return getter.result()
+        raise ConnectionResetError("subscriber queue overflowed")
+
+
+class ChatBroker(ABC):
+    @abstractmethod
+    async def subscribe(self, topic: str) -> Subscription:
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, subscription: Subscription):
+        ...
+
+    @abstractmethod
+    async def publish(self, topic: str, message: dict) -> int:
+        """Deliver ``message`` to every subscriber of ``topic``; returns how many got it."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryBroker(ChatBroker):
+    def __init__(self, queue_size: int, overflow_policy: str):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"CHAT_OVERFLOW_POLICY must be one of {OVERFLOW_POLICIES}")
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self._topics = defaultdict(set)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    async def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic, self.queue_size)
+        self._topics[topic].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[subscription.topic]
+
+    async def publish(self, topic: str, message: dict) -> int:
+        # Runs without awaiting, so fan-out is atomic with respect to the loop
+        self.published += 1
+        delivered = 0
+        for subscription in list(self._topics.get(topic, ())):
+            if subscription.overflowed.is_set():
+                continue
+            if subscription.queue.full():
+                if self.overflow_policy == "disconnect":
+                    subscription.overflowed.set()
+                    self.disconnected += 1
+                    continue
+                subscription.queue.get_nowait()
+                subscription.dropped += 1
+                self.dropped += 1
+            subscription.queue.put_nowait(message)
+            delivered += 1
+        self.delivered += delivered
+        return delivered
+
+    def stats(self) -> dict:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(s) for s in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "queue_size": self.queue_size,
+            "overflow_policy": self.overflow_policy,
+        }
+
+
+def conversation_topic(patient_id: int) -> str:
+    return f"chat:{patient_id}"
+
+
+chat_broker: ChatBroker = InMemoryBroker(CHAT_SUBSCRIBER_QUEUE_SIZE, CHAT_OVERFLOW_POLICY)
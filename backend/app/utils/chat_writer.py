@@ -0,0 +1,186 @@
+"""
+Group-commit write path for chat messages.
+
+submit() queues a message and waits for its row. A background task takes
+whatever is queued - up to CHAT_WRITER_MAX_BATCH messages, waiting at most
+CHAT_WRITER_FLUSH_MS for more after the first - and inserts it in one
+transaction, so N concurrent senders cost one commit (one fsync on SQLite)
+instead of N.
+
+Durability: submit() returns only after its transaction has committed,
+in every mode. There is no acknowledge-on-enqueue mode, since callers
+need the stored id (HTTP response, socket broadcast, client dedupe). How
+durable an acknowledged message is, is therefore the database's commit
+setting - on SQLite, SQLITE_SYNCHRONOUS: FULL fsyncs every commit and
+survives power loss, NORMAL (the default, with WAL) survives a process
+crash but can lose the last commits to a power cut. Group commit is what
+keeps FULL affordable: one fsync per batch. CHAT_WRITE_MODE=direct
+restores one transaction per message.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+
+from app.database.async_session import AsyncSessionLocal
+from app.database.doctorD import ChatMessage
+
+load_dotenv()
+
+logger = logging.getLogger("my_app")
+
+CHAT_WRITE_MODE = os.getenv("CHAT_WRITE_MODE", "batched")  # batched, direct
+CHAT_WRITER_MAX_BATCH = int(os.getenv("CHAT_WRITER_MAX_BATCH", "256"))
+CHAT_WRITER_FLUSH_MS = float(os.getenv("CHAT_WRITER_FLUSH_MS", "5"))
+CHAT_WRITER_MAX_PENDING = int(os.getenv("CHAT_WRITER_MAX_PENDING", "10000"))
+
+WRITE_MODES = ("batched", "direct")
+
+# The stored columns, returned with the id to match rows back to messages
+_ROW_KEY = (ChatMessage.patient_id, ChatMessage.sender, ChatMessage.text, ChatMessage.timestamp)
+
+
+class ChatWriter:
+    def __init__(self, mode: str, max_batch: int, flush_ms: float, max_pending: int, session_factory=AsyncSessionLocal):
+        if mode not in WRITE_MODES:
+            raise ValueError(f"CHAT_WRITE_MODE must be one of {WRITE_MODES}")
+        self.mode = mode
+        self.max_batch = max_batch
+        self.flush_seconds = flush_ms / 1000
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.messages = 0
+        self.largest_batch = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued, then end the background task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, patient_id: int, sender: str, text: str) -> ChatMessage:
+        """Persist one message; returns it with its id once committed."""
+        message = ChatMessage(
+            patient_id=patient_id,
+            sender=sender,
+            text=text,
+            timestamp=datetime.utcnow(),
+        )
+        if self.mode == "direct":
+            await self._write([message])
+            return message
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        # Waits when CHAT_WRITER_MAX_PENDING messages are already queued
+        await self._queue.put((message, future))
+        return await future
+
+    async def _write(self, messages: list[ChatMessage]):
+        # One multi-row INSERT per batch. The ORM would insert row by row
+        # here (SQLite cannot order RETURNING rows), a driver round trip each.
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                insert(ChatMessage).returning(ChatMessage.id, *_ROW_KEY),
+                [{column.key: getattr(message, column.key) for column in _ROW_KEY} for message in messages],
+            )).all()
+            await db.commit()
+        # RETURNING order is unspecified; rows with the same key are interchangeable
+        by_key = defaultdict(list)
+        for message in messages:
+            by_key[tuple(getattr(message, column.key) for column in _ROW_KEY)].append(message)
+        for message_id, *key in rows:
+            by_key[tuple(key)].pop().id = message_id
+        self.batches += 1
+        self.messages += len(messages)
+        self.largest_batch = max(self.largest_batch, len(messages))
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list):
+        try:
+            await self._write([message for message, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                self._resolve(batch, exc)
+                return
+            # Retry one by one so a single bad row fails only its own sender
+            logger.warning(f"Chat batch of {len(batch)} failed ({exc!r}); writing individually")
+            for message, future in batch:
+                try:
+                    await self._write([message])
+                except Exception as item_exc:
+                    self._resolve([(message, future)], item_exc)
+                else:
+                    self._resolve([(message, future)])
+            return
+        self._resolve(batch)
+
+    @staticmethod
+    def _resolve(batch: list, error: Exception | None = None):
+        for message, future in batch:
+            if future.done():
+                continue  # sender gave up (cancelled)
+            if error is None:
+                future.set_result(message)
+            else:
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "messages": self.messages,
+            "avg_batch": round(self.messages / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "max_batch": self.max_batch,
+            "flush_ms": self.flush_seconds * 1000,
+        }
+
+
+chat_writer = ChatWriter(CHAT_WRITE_MODE, CHAT_WRITER_MAX_BATCH, CHAT_WRITER_FLUSH_MS, CHAT_WRITER_MAX_PENDING)
@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, date) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Cursor -> one value per column, typed for the column; 400 if malformed."""
+    invalid = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise invalid
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise invalid
+
+    try:
+        return [_column_value(col, v) for col, v in zip(columns, values)]
+    except (TypeError, ValueError):
+        raise invalid
+
+
+def keyset_page(query, columns: list, cursor: str | None, limit: int, descending: bool = False):
+    """
+    Apply keyset pagination over ``columns`` (the last one must be unique,
+    e.g. the primary key). Returns (rows, next_cursor); next_cursor is None
+    on the last page. ``columns`` should match a composite index so each
+    page is an index range scan regardless of how deep it is.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [col.desc() for col in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, col.key) for col in columns])
+
+
+def _column_value(column, value):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if python_type is date:
+        if not isinstance(value, str):
+            raise TypeError(f"{column.key}: expected an ISO date")
+        return date.fromisoformat(value)
+    # bool is an int subclass; neither belongs in an int or str key
+    if python_type in (int, str) and (isinstance(value, bool) or not isinstance(value, python_type)):
+        raise TypeError(f"{column.key}: expected {python_type.__name__}")
+    return value
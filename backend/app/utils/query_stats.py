@@ -0,0 +1,125 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+Cursor-execute events on every Engine feed the RequestQueryStats of the
+request currently being served (tracked in a contextvar, set by the
+middleware in main.py). A statement shape that runs more than
+N_PLUS_ONE_THRESHOLD times in one request is logged as a likely N+1.
+
+In tests, ``assert_max_queries`` bounds the statements an endpoint issues:
+
+    with assert_max_queries(3):
+        client.get("/api/admin/appointments/today", headers=auth)
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils import slow_query
+
+load_dotenv()
+
+logger = logging.getLogger("my_app.sql")
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+
+class RequestQueryStats:
+    def __init__(self, route: str):
+        self.route = route
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes = Counter()
+        self.flagged = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.shapes[statement] += 1
+            repeats = self.shapes[statement]
+
+        # Bound parameters keep the text identical across rows, so repeats
+        # of the same text are the per-row lookups of an N+1 loop
+        if repeats == N_PLUS_ONE_THRESHOLD + 1:
+            self.flagged.append(statement)
+            logger.warning(
+                f"Possible N+1 on {self.route}: statement repeated more than "
+                f"{N_PLUS_ONE_THRESHOLD} times: {' '.join(statement.split())[:300]}"
+            )
+
+    @property
+    def total_ms(self) -> float:
+        return round(self.total_seconds * 1000, 2)
+
+
+_current_stats = contextvars.ContextVar("request_query_stats", default=None)
+
+# Active assert_max_queries blocks; global so they see statements from any
+# thread (TestClient runs the app outside the caller's context)
+_captures = []
+_captures_lock = threading.Lock()
+
+
+def start_request(route: str):
+    stats = RequestQueryStats(route)
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token):
+    _current_stats.reset(token)
+
+
+def current_request_stats() -> RequestQueryStats | None:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    slow_query.observe(
+        conn, statement, parameters, executemany, elapsed,
+        stats.route if stats is not None else None,
+    )
+
+    if _captures:
+        with _captures_lock:
+            for captured in _captures:
+                captured.append(statement)
+
+
+# ---------------- Test helper ----------------
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail with the offending statements if the block runs more than ``limit``."""
+    captured = []
+    with _captures_lock:
+        _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        with _captures_lock:
+            _captures.remove(captured)
+
+    if len(captured) > limit:
+        listing = "\n".join(f"  {i + 1}. {' '.join(s.split())}" for i, s in enumerate(captured))
+        raise AssertionError(f"Expected at most {limit} queries, got {len(captured)}:\n{listing}")
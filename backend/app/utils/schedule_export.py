@@ -0,0 +1,237 @@
+"""
+Streaming CSV / iCalendar export of appointments.
+
+Rows are read with ``yield_per`` (server-side cursor where the driver has
+one) and rendered one partition at a time into a StreamingResponse, so
+memory stays flat whatever the range. Each export carries an ETag built
+from count / max(updated_at) / max(id) / sum(revision) over the same
+filters - a single aggregate - and a matching If-None-Match gets a 304
+before any rows are read. updated_at only has one-second resolution on
+SQLite; the per-row revision counter catches edits within that second. Renaming a patient or doctor does not change the ETag.
+"""
+import csv
+import hashlib
+import io
+import os
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.database.models import Appointment, Doctor, User
+from app.database.session import SessionLocal, replica_set
+from app.utils.scheduling import DEFAULT_SLOT_MINUTES
+
+load_dotenv()
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+EXPORT_EVENT_MINUTES = int(os.getenv("EXPORT_EVENT_MINUTES", str(DEFAULT_SLOT_MINUTES)))
+ICS_PRODID = "-//Telemedicine//Schedule Export//EN"
+
+CSV_COLUMNS = [
+    "id", "date", "time", "status", "type", "doctor_id", "doctor_name",
+    "patient_id", "patient_name", "reason",
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ics": "text/calendar; charset=utf-8",
+}
+
+
+def appointment_filters(
+    doctor_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    status: str | None = None,
+) -> list:
+    filters = []
+    if doctor_id is not None:
+        filters.append(Appointment.doctor_id == doctor_id)
+    if start is not None:
+        filters.append(Appointment.appointment_date >= start)
+    if end is not None:
+        filters.append(Appointment.appointment_date <= end)
+    if status:
+        filters.append(Appointment.status == status)
+    return filters
+
+
+def export_session() -> Session:
+    """A read replica when one is healthy, otherwise the primary."""
+    return replica_set.session() or SessionLocal()
+
+
+# ---------------- ETag ----------------
+def export_etag(db: Session, fmt: str, filters: list, key: str) -> str:
+    count, last_updated, last_id, revisions = db.execute(
+        select(
+            func.count(Appointment.id),
+            func.max(Appointment.updated_at),
+            func.max(Appointment.id),
+            func.sum(Appointment.revision),
+        )
+        .where(*filters)
+    ).one()
+    digest = hashlib.sha256(f"{fmt}|{key}|{count}|{last_updated}|{last_id}|{revisions}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# ---------------- Rendering ----------------
+def _rows(db: Session, filters: list):
+    statement = (
+        select(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.status,
+            Appointment.type,
+            Appointment.doctor_id,
+            Doctor.name.label("doctor_name"),
+            Appointment.patient_id,
+            func.coalesce(User.username, Appointment.patient_name).label("patient_name"),
+            Appointment.reason,
+        )
+        .join(Doctor, Doctor.id == Appointment.doctor_id)
+        .outerjoin(User, User.id == Appointment.patient_id)
+        .where(*filters)
+        .order_by(Appointment.appointment_date, Appointment.appointment_time, Appointment.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+    return db.execute(statement).partitions()
+
+
+def _csv_chunks(partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+
+    for partition in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            writer.writerow([
+                row.id, row.appointment_date.isoformat(), row.appointment_time, row.status,
+                row.type or "", row.doctor_id, row.doctor_name,
+                row.patient_id if row.patient_id is not None else "", row.patient_name or "",
+                row.reason or "",
+            ])
+        yield buffer.getvalue()
+
+
+def _ics_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line: str) -> str:
+    """RFC 5545 3.1: lines longer than 75 octets continue with a leading space."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # never split a UTF-8 sequence
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_times(row) -> list[str]:
+    try:
+        start = datetime.combine(row.appointment_date, datetime.strptime(row.appointment_time, "%H:%M").time())
+    except ValueError:
+        # Free-text time from old data: an all-day event still lands on the right day
+        return [f"DTSTART;VALUE=DATE:{row.appointment_date:%Y%m%d}"]
+    end = start + timedelta(minutes=EXPORT_EVENT_MINUTES)
+    return [f"DTSTART:{start:%Y%m%dT%H%M%S}", f"DTEND:{end:%Y%m%dT%H%M%S}"]
+
+
+def _ics_event(row, stamp: str) -> str:
+    summary = f"{row.type or 'Appointment'}: {row.patient_name or 'Unknown'}"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:appointment-{row.id}@telemedicine",
+        f"DTSTAMP:{stamp}",
+        *_ics_times(row),
+        f"SUMMARY:{_ics_escape(summary)}",
+        f"STATUS:{'CANCELLED' if row.status == 'cancelled' else 'CONFIRMED'}",
+    ]
+    if row.reason:
+        lines.append(f"DESCRIPTION:{_ics_escape(row.reason)}")
+    lines.append("END:VEVENT")
+    return "".join(_ics_fold(line) for line in lines)
+
+
+def _ics_chunks(partitions, calendar_name: str):
+    stamp = f"{datetime.utcnow():%Y%m%dT%H%M%SZ}"
+    yield "".join(_ics_fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{ICS_PRODID}",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_escape(calendar_name)}",
+    ])
+    for partition in partitions:
+        yield "".join(_ics_event(row, stamp) for row in partition)
+    yield "END:VCALENDAR\r\n"
+
+
+# ---------------- Response ----------------
+def check_format(fmt: str):
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Export format must be csv or ics")
+
+
+def export_response(
+    request: Request,
+    fmt: str,
+    filters: list,
+    filename: str,
+    etag_key: str,
+    calendar_name: str = "Appointments",
+) -> Response:
+    """
+    304 if the client's copy is current, otherwise the export streamed from
+    a session that lives as long as the response body.
+    """
+    db = export_session()
+    try:
+        etag = export_etag(db, fmt, filters, etag_key)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request, etag):
+            db.close()
+            return Response(status_code=304, headers=headers)
+        partitions = _rows(db, filters)
+    except Exception:
+        db.close()
+        raise
+
+    def body():
+        try:
+            if fmt == "ics":
+                yield from _ics_chunks(partitions, calendar_name)
+            else:
+                yield from _csv_chunks(partitions)
+        finally:
+            db.close()
+
+    headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[fmt], headers=headers)
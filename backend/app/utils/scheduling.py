@@ -0,0 +1,362 @@
+"""
+Doctor slot availability.
+
+Each doctor's weekly working hours become, per weekday, an integer bitmap
+where bit ``i`` is the slot starting at ``i * slot_minutes`` after midnight.
+A day's free slots are ``template & ~booked``; answering a month for many
+doctors takes at most two queries (templates not yet in template_index,
+live bookings in range) plus bit operations.
+
+Double bookings are prevented by the partial unique index
+ux_appoint_ments_doctor_slot, so reserve_slot is atomic under concurrency.
+"""
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database.models import Appointment, Doctor, DoctorWorkingHours
+
+load_dotenv()
+
+# Used for doctors without any doctor_working_hours rows
+DEFAULT_WORKING_HOURS = os.getenv("DEFAULT_WORKING_HOURS", "09:00-17:00")
+DEFAULT_WORKING_DAYS = os.getenv("DEFAULT_WORKING_DAYS", "0,1,2,3,4")  # Monday..Friday
+DEFAULT_SLOT_MINUTES = int(os.getenv("DEFAULT_SLOT_MINUTES", "30"))
+MAX_AVAILABILITY_DAYS = int(os.getenv("MAX_AVAILABILITY_DAYS", "62"))
+TEMPLATE_CACHE_TTL_SECONDS = float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "300"))
+EARLIEST_SEARCH_BATCH = int(os.getenv("EARLIEST_SEARCH_BATCH", "200"))
+
+FREE_STATUSES = ("cancelled",)
+
+
+class DayTemplate(NamedTuple):
+    mask: int
+    slot_minutes: int
+
+
+# ---------------- Time helpers ----------------
+def to_minutes(hhmm: str) -> int:
+    try:
+        hours, minutes = hhmm.split(":")
+        value = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid time '{hhmm}', expected HH:MM")
+    if not 0 <= value < 24 * 60:
+        raise HTTPException(status_code=400, detail=f"Invalid time '{hhmm}', expected HH:MM")
+    return value
+
+
+def to_hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def range_mask(start_minute: int, end_minute: int, slot_minutes: int) -> int:
+    first = -(-start_minute // slot_minutes)  # first slot starting at/after start
+    last = (end_minute - slot_minutes) // slot_minutes  # last slot ending by end
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def mask_to_times(mask: int, slot_minutes: int) -> list[str]:
+    times = []
+    while mask:
+        low = mask & -mask
+        times.append(to_hhmm((low.bit_length() - 1) * slot_minutes))
+        mask ^= low
+    return times
+
+
+def _default_template() -> dict[int, DayTemplate]:
+    start, end = DEFAULT_WORKING_HOURS.split("-")
+    mask = range_mask(to_minutes(start), to_minutes(end), DEFAULT_SLOT_MINUTES)
+    return {
+        int(day): DayTemplate(mask, DEFAULT_SLOT_MINUTES)
+        for day in DEFAULT_WORKING_DAYS.split(",") if day.strip()
+    }
+
+
+# ---------------- Loading ----------------
+def load_templates(db: Session, doctor_ids: list[int]) -> dict[int, dict[int, DayTemplate]]:
+    """doctor_id -> weekday -> DayTemplate, in one query."""
+    # Plain columns, not entities: a specialization can mean thousands of rows
+    rows = db.execute(
+        select(
+            DoctorWorkingHours.doctor_id,
+            DoctorWorkingHours.weekday,
+            DoctorWorkingHours.start_time,
+            DoctorWorkingHours.end_time,
+            DoctorWorkingHours.slot_minutes,
+        ).where(DoctorWorkingHours.doctor_id.in_(doctor_ids))
+    ).all()
+
+    templates = defaultdict(dict)
+    masks = {}  # most doctors share a handful of shifts
+    for doctor_id, weekday, start_time, end_time, row_slot_minutes in rows:
+        day = templates[doctor_id].get(weekday)
+        # Several ranges on one weekday share the first range's slot length
+        slot_minutes = day.slot_minutes if day else row_slot_minutes
+        key = (start_time, end_time, slot_minutes)
+        if key not in masks:
+            masks[key] = range_mask(to_minutes(start_time), to_minutes(end_time), slot_minutes)
+        templates[doctor_id][weekday] = DayTemplate((day.mask if day else 0) | masks[key], slot_minutes)
+
+    default = _default_template()
+    return {doctor_id: templates.get(doctor_id, default) for doctor_id in doctor_ids}
+
+
+class TemplateIndex:
+    """
+    Process-wide cache of compiled weekly templates. Local edits to
+    doctor_working_hours invalidate the doctor at once; edits made by other
+    workers are picked up after TEMPLATE_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._templates = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, doctor_ids: list[int]) -> dict[int, dict[int, DayTemplate]]:
+        now = time.monotonic()
+        with self._lock:
+            missing = [
+                doctor_id for doctor_id in doctor_ids
+                if now - self._loaded_at.get(doctor_id, -self.ttl_seconds - 1) > self.ttl_seconds
+            ]
+        if missing:
+            loaded = load_templates(db, missing)
+            with self._lock:
+                self._templates.update(loaded)
+                self._loaded_at.update(dict.fromkeys(loaded, now))
+        with self._lock:
+            return {doctor_id: self._templates[doctor_id] for doctor_id in doctor_ids}
+
+    def invalidate(self, doctor_id: int):
+        with self._lock:
+            self._loaded_at.pop(doctor_id, None)
+
+
+template_index = TemplateIndex(TEMPLATE_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(DoctorWorkingHours, "after_insert")
+@event.listens_for(DoctorWorkingHours, "after_update")
+@event.listens_for(DoctorWorkingHours, "after_delete")
+def _invalidate_template(mapper, connection, target):
+    template_index.invalidate(target.doctor_id)
+
+
+def load_booked(db: Session, doctor_ids: list[int], start: date, end: date) -> dict:
+    """(doctor_id, date) -> list of booked start minutes, in one query."""
+    rows = db.execute(
+        select(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time)
+        .where(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.appointment_date >= start,
+            Appointment.appointment_date <= end,
+            Appointment.status.notin_(FREE_STATUSES),
+        )
+    ).all()
+
+    booked = defaultdict(list)
+    for doctor_id, day, hhmm in rows:
+        try:
+            booked[(doctor_id, day)].append(to_minutes(hhmm))
+        except HTTPException:
+            continue  # legacy free-text time; cannot occupy a slot
+    return booked
+
+
+def free_mask(template: DayTemplate | None, booked_minutes: list[int]) -> int:
+    if template is None:
+        return 0
+    taken = 0
+    for minute in booked_minutes:
+        taken |= 1 << (minute // template.slot_minutes)
+    return template.mask & ~taken
+
+
+# ---------------- Availability ----------------
+def _check_range(start: date, end: date):
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days + 1 > MAX_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Availability range is limited to {MAX_AVAILABILITY_DAYS} days",
+        )
+
+
+def _now() -> tuple[date, int]:
+    """Today and the current minute of the day (server local time)."""
+    now = datetime.now()
+    return now.date(), now.hour * 60 + now.minute
+
+
+def drop_started(mask: int, template: DayTemplate, not_before_minute: int) -> int:
+    """Clear the slots that start before ``not_before_minute``."""
+    first_slot = -(-not_before_minute // template.slot_minutes)
+    return mask & ~((1 << first_slot) - 1)
+
+
+def get_availability(db: Session, doctor_ids: list[int], start: date, end: date) -> dict:
+    """
+    doctor_id -> [{"date", "slots"}] for days with at least one free slot.
+    Days before today and slots that already started today are left out.
+    """
+    _check_range(start, end)
+    today, now_minute = _now()
+    start = max(start, today)
+    templates = template_index.get(db, doctor_ids)
+    booked = load_booked(db, doctor_ids, start, end)
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    result = {}
+    for doctor_id in doctor_ids:
+        weekly = templates[doctor_id]
+        result[doctor_id] = []
+        for day in days:
+            template = weekly.get(day.weekday())
+            mask = free_mask(template, booked.get((doctor_id, day), ()))
+            if mask and day == today:
+                mask = drop_started(mask, template, now_minute)
+            if mask:
+                result[doctor_id].append({
+                    "date": day,
+                    "slots": mask_to_times(mask, template.slot_minutes),
+                })
+    return result
+
+
+def find_earliest_available(
+    db: Session,
+    doctor_filters: list,
+    start: date,
+    end: date,
+    limit: int,
+) -> list[dict]:
+    """
+    Top ``limit`` doctors matching ``doctor_filters`` ranked by earliest
+    free slot, then fee, then id.
+
+    The window is walked a day at a time. A doctor's first working slot
+    is a lower bound on their first free one, so candidates are taken in
+    (first slot, fee, id) order in batches (EARLIEST_SEARCH_BATCH, then
+    doubling), and each batch's bookings for the day are loaded in one
+    query and masked off in memory. The day is done once the next batch cannot beat the
+    hits already in hand, which is usually after the first batch.
+    """
+    _check_range(start, end)
+    today, now_minute = _now()
+    # A past "from" must not surface slots that are already gone
+    start = max(start, today)
+    if start > end:
+        return []
+
+    fees = dict(db.execute(
+        select(Doctor.id, Doctor.consultation_fee).where(*doctor_filters)
+    ).all())
+    if not fees:
+        return []
+    templates = template_index.get(db, list(fees))
+
+    found = []  # (date, minute, fee, doctor_id), best first
+    remaining = set(fees)
+    day = start
+    while day <= end and remaining and len(found) < limit:
+        weekday = day.weekday()
+        not_before = now_minute if day == today else 0
+        candidates = []
+        for doctor_id in remaining:
+            template = templates[doctor_id].get(weekday)
+            if template is None:
+                continue
+            mask = drop_started(template.mask, template, not_before) if not_before else template.mask
+            if mask:
+                first = ((mask & -mask).bit_length() - 1) * template.slot_minutes
+                candidates.append((first, fees[doctor_id], doctor_id))
+        candidates.sort()
+
+        wanted = limit - len(found)
+        hits = []
+        offset, size = 0, EARLIEST_SEARCH_BATCH
+        while offset < len(candidates):
+            batch = candidates[offset:offset + size]
+            if len(hits) >= wanted and heapq.nsmallest(wanted, hits)[-1] < batch[0]:
+                break
+            # Doubling keeps a fully booked day to a handful of queries
+            offset, size = offset + size, min(size * 2, EARLIEST_SEARCH_BATCH * 16)
+            booked = load_booked(db, [doctor_id for _, _, doctor_id in batch], day, day)
+            for _, fee, doctor_id in batch:
+                template = templates[doctor_id][weekday]
+                mask = free_mask(template, booked.get((doctor_id, day), ()))
+                if not_before:
+                    mask = drop_started(mask, template, not_before)
+                if mask:
+                    hits.append((((mask & -mask).bit_length() - 1) * template.slot_minutes, fee, doctor_id))
+
+        for minute, fee, doctor_id in heapq.nsmallest(wanted, hits):
+            found.append((day, minute, fee, doctor_id))
+            remaining.discard(doctor_id)
+        day += timedelta(days=1)
+
+    doctors = {
+        doctor.id: doctor
+        for doctor in db.execute(
+            select(Doctor).where(Doctor.id.in_([hit[3] for hit in found]))
+        ).scalars()
+    }
+    return [
+        {"doctor": doctors[doctor_id], "date": day, "time": to_hhmm(minute)}
+        for day, minute, _, doctor_id in found
+    ]
+
+
+# ---------------- Booking ----------------
+def slot_in_template(template: DayTemplate | None, minute: int) -> bool:
+    """True if ``minute`` starts one of the template's working slots."""
+    return (
+        template is not None
+        and not minute % template.slot_minutes
+        and bool(template.mask >> (minute // template.slot_minutes) & 1)
+    )
+
+
+def has_started(day: date, minute: int) -> bool:
+    today, now_minute = _now()
+    return day < today or (day == today and minute < now_minute)
+
+
+def validate_slot(db: Session, doctor_id: int, day: date, hhmm: str):
+    """400 unless ``hhmm`` starts a future slot inside the doctor's working hours."""
+    minute = to_minutes(hhmm)
+    if has_started(day, minute):
+        raise HTTPException(status_code=400, detail="Requested time is in the past")
+    template = template_index.get(db, [doctor_id])[doctor_id].get(day.weekday())
+    if not slot_in_template(template, minute):
+        raise HTTPException(status_code=400, detail="Requested time is outside the doctor's working hours")
+
+
+def reserve_slot(db: Session, appointment: Appointment):
+    """
+    Flush the new or moved appointment; the unique slot index makes the
+    check-and-claim atomic. Raises 409 if someone else holds the slot.
+    """
+    db.add(appointment)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="This slot is already booked")
@@ -0,0 +1,153 @@
+"""
+Slow-query log and cumulative per-statement timings.
+
+Every statement is folded into a fingerprint (whitespace collapsed, IN-lists
+of placeholders shortened) and its timings accumulated since startup. Those
+slower than SLOW_QUERY_THRESHOLD_MS are logged with the issuing route, the
+shape of their bound parameters and - at most once per fingerprint every
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS - the database's query plan.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("my_app.sql")
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "5000"))
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    if executemany:
+        return f"executemany x{len(parameters)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if parameters:
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return "()"
+
+
+class StatementTimings:
+    def __init__(self, max_fingerprints: int):
+        self.max_fingerprints = max_fingerprints
+        self._stats = {}
+        self._last_explained = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def record(self, key: str, seconds: float, slow: bool):
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return
+                entry = self._stats[key] = {"count": 0, "total": 0.0, "max": 0.0, "slow": 0}
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            if slow:
+                entry["slow"] += 1
+
+    def should_explain(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(key)
+            if last is not None and now - last < SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+                return False
+            if last is None and len(self._last_explained) >= self.max_fingerprints:
+                # Forget fingerprints whose interval has passed; if all are
+                # recent, skip the plan rather than grow without bound
+                self._last_explained = {
+                    k: t for k, t in self._last_explained.items()
+                    if now - t < SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+                }
+                if len(self._last_explained) >= self.max_fingerprints:
+                    return False
+            self._last_explained[key] = now
+            return True
+
+    def top(self, limit: int) -> list[dict]:
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+        return [
+            {
+                "statement": key,
+                "calls": entry["count"],
+                "total_ms": round(entry["total"] * 1000, 2),
+                "avg_ms": round(entry["total"] / entry["count"] * 1000, 3),
+                "max_ms": round(entry["max"] * 1000, 2),
+                "slow_calls": entry["slow"],
+            }
+            for key, entry in items
+        ]
+
+
+statement_timings = StatementTimings(SLOW_QUERY_MAX_FINGERPRINTS)
+
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None:
+        return None
+
+    # Raw DBAPI cursor: bypasses engine events, so this is not re-counted.
+    # The caller's transaction is still open; a savepoint keeps a failed
+    # EXPLAIN from aborting it (PostgreSQL) or leaving anything behind.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" | ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        finally:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def observe(conn, statement: str, parameters, executemany: bool, seconds: float, route: str | None):
+    key = fingerprint(statement)
+    slow = seconds * 1000 >= SLOW_QUERY_THRESHOLD_MS
+    statement_timings.record(key, seconds, slow)
+    if not slow:
+        return
+
+    plan = None
+    is_read = key.split(" ", 1)[0].upper() in ("SELECT", "WITH")
+    if is_read and not executemany and statement_timings.should_explain(key):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as exc:
+            logger.warning(f"EXPLAIN failed for slow query {key}: {exc}")
+
+    logger.warning(
+        f"Slow query {seconds * 1000:.1f} ms route={route or '-'} "
+        f"params={parameter_shape(parameters, executemany)}: {key}"
+        + (f"\nplan:\n{plan}" if plan else "")
+    )
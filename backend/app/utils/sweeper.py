@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, select
+
+logger = logging.getLogger("my_app")
+
+
+def delete_expired_in_batches(db, model, expiry_column, now, batch_size: int = 1000) -> int:
+    """
+    Deletes rows whose ``expiry_column`` is before ``now``, ``batch_size``
+    rows per transaction, so no single statement holds a long write lock.
+    """
+    total = 0
+    while True:
+        ids = db.execute(
+            select(model.id).where(expiry_column < now).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return total
+
+        db.execute(delete(model).where(model.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+
+
+class PeriodicSweeper:
+    """
+    Runs registered maintenance jobs on a single daemon thread.
+
+    Jobs are plain callables; a failing job is logged and retried on its
+    next interval without affecting the others.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = tick_seconds
+        self._jobs = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, interval_seconds: float, job):
+        self._jobs[name] = {"interval": interval_seconds, "job": job, "next_run": 0.0}
+
+    def run_pending(self):
+        now = time.monotonic()
+        for name, entry in self._jobs.items():
+            if entry["next_run"] > now:
+                continue
+            entry["next_run"] = now + entry["interval"]
+            try:
+                entry["job"]()
+            except Exception:
+                logger.exception(f"Background job '{name}' failed")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+sweeper = PeriodicSweeper()
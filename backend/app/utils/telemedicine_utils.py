@@ -21,27 +21,34 @@ def search_doctors(
 
     # 2️⃣ Flexible specialization search
     if specialization:
-        spec = specialization.strip().lower()
-
-        config = (
-            db.query(ConfigMaster)
-            .filter(ConfigMaster.config_type == "SPECIALIZATION")
-            .filter(
-                or_(
-                    ConfigMaster.code.ilike(f"%{spec}%"),
-                    ConfigMaster.value.ilike(f"%{spec}%")
-                )
-            )
-            .first()
-        )
+        spec_code = resolve_specialization(db, specialization)
 
-        if not config:
+        if spec_code is None:
             return []  # no matching specialization
 
-        query = query.filter(Doctor.specialization == config.code)
+        query = query.filter(Doctor.specialization == spec_code)
 
     return query.all()
 
+
+def resolve_specialization(db: Session, specialization: str):
+    """Matches free text against SPECIALIZATION config code/value; returns the code"""
+    spec = specialization.strip().lower()
+
+    config = (
+        db.query(ConfigMaster)
+        .filter(ConfigMaster.config_type == "SPECIALIZATION")
+        .filter(
+            or_(
+                ConfigMaster.code.ilike(f"%{spec}%"),
+                ConfigMaster.value.ilike(f"%{spec}%")
+            )
+        )
+        .first()
+    )
+
+    return config.code if config else None
+
 # ---------------- Doctor Details ----------------
 def get_doctor_by_id(db, doctor_id: int):
     doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
@@ -109,15 +116,6 @@ def get_user_health_reports(db: Session, user_id: int):
 # ---------------- Notifications ----------------
 
 
-def get_user_notifications(db: Session, user_id: int):
-    return (
-        db.query(Notification)
-        .filter(Notification.user_id == user_id)
-        .order_by(Notification.created_at.desc())
-        .all()
-    )
-
-
 def mark_notification_read(db: Session, user_id: int, notification_id: int):
     notif = (
         db.query(Notification)
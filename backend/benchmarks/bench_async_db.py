@@ -0,0 +1,101 @@
+"""
+Sync (threadpool + Session) vs async (event loop + AsyncSession) read
+throughput under many concurrent clients.
+
+Run from the backend directory (needs httpx in addition to requirements.txt):
+
+    python -m benchmarks.bench_async_db [--clients 500] [--requests 5000]
+
+Uses a throwaway SQLite database seeded with doctors, and serves the same
+doctor-search query through both paths in-process via httpx's ASGI transport.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench_async_db_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database.session import Base, SessionLocal, engine, get_db  # noqa: E402
+from app.database.async_session import get_async_db  # noqa: E402
+from app.database.models import Doctor  # noqa: E402
+from app.utils import async_telemedicine_utils, telemedicine_utils  # noqa: E402
+
+app = FastAPI()
+
+
+@app.get("/sync/doctors")
+def sync_doctors(name: str, db: Session = Depends(get_db)):
+    return [d.id for d in telemedicine_utils.search_doctors(db, name)]
+
+
+@app.get("/async/doctors")
+async def async_doctors(name: str, db: AsyncSession = Depends(get_async_db)):
+    return [d.id for d in await async_telemedicine_utils.search_doctors(db, name)]
+
+
+def seed(count: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(
+        Doctor(
+            name=f"Doctor {i}",
+            specialization="GENERAL",
+            experience=i % 30,
+            consultation_fee=300 + i % 700,
+        )
+        for i in range(count)
+    )
+    db.commit()
+    db.close()
+
+
+async def run(path: str, clients: int, total: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(clients)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, params={"name": f"Doctor {i % 100}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{path:<16} {total / elapsed:>8,.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--doctors", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed(args.doctors)
+    print(f"{args.clients} concurrent clients, {args.requests} requests each run")
+    asyncio.run(run("/sync/doctors", args.clients, args.requests))
+    asyncio.run(run("/async/doctors", args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Importing N appointments one at a time (the POST /api/appointments path:
+doctor lookup, slot validation, reserve, commit, refresh per item) vs one
+book_appointments call (set-based validation, single transaction).
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bulk_booking [--items 10000] [--doctors 200]
+
+Uses a throwaway SQLite database; each run books into its own date range
+so both approaches see the same amount of existing data.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_bulk_booking_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from app.database.session import Base, SessionLocal, engine  # noqa: E402
+from app.database.models import Appointment, Doctor, User  # noqa: E402
+import app.database.appointment_rollup  # noqa: E402,F401  (rollup listeners)
+from app.schemas.appointment import BulkAppointmentItem  # noqa: E402
+from app.utils.bulk_booking import book_appointments  # noqa: E402
+from app.utils.scheduling import reserve_slot, to_hhmm, to_minutes, validate_slot  # noqa: E402
+
+
+def seed(doctors: int) -> User:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all(
+        Doctor(name=f"Doctor {i}", specialization="GENERAL", experience=i % 30, consultation_fee=500)
+        for i in range(doctors)
+    )
+    admin = User(username="bench-admin", email="bench@example.com", password_hash="x", role="admin")
+    db.add(admin)
+    db.commit()
+    db.refresh(admin)
+    db.expunge(admin)
+    db.close()
+    return admin
+
+
+def make_items(count: int, doctors: int, first_day: date) -> list[BulkAppointmentItem]:
+    """Weekday slots 09:00-16:30 spread over every doctor."""
+    items = []
+    day = first_day
+    while len(items) < count:
+        if day.weekday() < 5:
+            for minute in range(9 * 60, 17 * 60, 30):
+                for doctor_id in range(1, doctors + 1):
+                    items.append(BulkAppointmentItem(
+                        doctor_id=doctor_id,
+                        appointment_date=day,
+                        appointment_time=to_hhmm(minute),
+                    ))
+        day += timedelta(days=1)
+    return items[:count]
+
+
+def one_by_one(items, user) -> float:
+    started = time.perf_counter()
+    db = SessionLocal()
+    for item in items:
+        db.query(Doctor).filter(Doctor.id == item.doctor_id).first()
+        appointment_time = to_hhmm(to_minutes(item.appointment_time))
+        validate_slot(db, item.doctor_id, item.appointment_date, appointment_time)
+        appointment = Appointment(
+            patient_id=user.id,
+            doctor_id=item.doctor_id,
+            appointment_date=item.appointment_date,
+            appointment_time=appointment_time,
+            status="scheduled",
+        )
+        reserve_slot(db, appointment)
+        db.commit()
+        db.refresh(appointment)
+    db.close()
+    return time.perf_counter() - started
+
+
+def bulk(items, user, mode) -> float:
+    started = time.perf_counter()
+    db = SessionLocal()
+    result = book_appointments(db, items, mode, user)
+    db.commit()
+    db.close()
+    elapsed = time.perf_counter() - started
+    assert result["created"] == len(items), result["failed"]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--doctors", type=int, default=200)
+    args = parser.parse_args()
+
+    user = seed(args.doctors)
+    # Far enough apart that the runs never share a day
+    start = date.today() + timedelta(days=7)
+    runs = [
+        ("one request per item", lambda items: one_by_one(items, user)),
+        ("bulk all_or_nothing", lambda items: bulk(items, user, "all_or_nothing")),
+        ("bulk per_item", lambda items: bulk(items, user, "per_item")),
+    ]
+
+    print(f"{args.items} appointments over {args.doctors} doctors")
+    for offset, (label, run) in enumerate(runs):
+        items = make_items(args.items, args.doctors, start + timedelta(days=offset * 366))
+        elapsed = run(items)
+        print(f"{label:<22} {elapsed:8.2f} s  {args.items / elapsed:>10,.0f} appointments/s")
+
+
+if __name__ == "__main__":
+    main()
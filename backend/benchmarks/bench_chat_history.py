@@ -0,0 +1,95 @@
+"""
+Chat history page latency as a conversation grows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_chat_history [--sizes 1000,10000,100000] [--rounds 500]
+
+For each thread size, times the three page shapes a client issues -
+latest page, the delta after a recent message, and an older page before
+a message deep in the thread - through async_telemedicine_utils on a
+throwaway SQLite database with ix_chat_messages_patient_id_id.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_chat_history_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database.session import Base, engine  # noqa: E402
+from app.database.async_session import AsyncSessionLocal  # noqa: E402
+from app.database.doctorD import ChatMessage  # noqa: E402
+from app.utils import async_telemedicine_utils  # noqa: E402
+
+PAGE = 100
+
+
+def seed(patient_id: int, count: int) -> list[int]:
+    """Insert ``count`` messages for one patient plus noise for another; returns their ids."""
+    Base.metadata.create_all(bind=engine)
+    started = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, count, 10000):
+            rows = []
+            for i in range(offset, min(offset + 10000, count)):
+                timestamp = started + timedelta(seconds=i)
+                rows.append({"patient_id": patient_id, "sender": "patient", "text": f"message {i}", "timestamp": timestamp})
+                rows.append({"patient_id": patient_id + 1, "sender": "doctor", "text": f"noise {i}", "timestamp": timestamp})
+            conn.execute(insert(ChatMessage), rows)
+        ids = conn.execute(
+            ChatMessage.__table__.select().with_only_columns(ChatMessage.id)
+            .where(ChatMessage.patient_id == patient_id).order_by(ChatMessage.id)
+        ).scalars().all()
+    return ids
+
+
+async def time_calls(label: str, rounds: int, call):
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await call(db)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    print(
+        f"  {label:<14} p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms"
+    )
+
+
+async def run(size: int, rounds: int, patient_id: int):
+    ids = seed(patient_id, size)
+    get = async_telemedicine_utils.get_chat_history
+    print(f"thread of {size:,} messages")
+    await time_calls("latest page", rounds, lambda db: get(db, patient_id, PAGE))
+    await time_calls("delta after", rounds, lambda db: get(db, patient_id, PAGE, after_id=ids[-10]))
+    await time_calls("page before", rounds, lambda db: get(db, patient_id, PAGE, before_id=ids[len(ids) // 2]))
+
+
+async def run_all(sizes: list[int], rounds: int):
+    # One event loop for all sizes: the async engine's connections belong to it
+    for n, size in enumerate(sizes):
+        # A fresh conversation per size; patient ids never overlap
+        await run(size, rounds, patient_id=10 * (n + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    asyncio.run(run_all(sizes, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
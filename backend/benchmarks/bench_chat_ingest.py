@@ -0,0 +1,71 @@
+"""
+Chat message ingest: one transaction per message (CHAT_WRITE_MODE=direct)
+vs group commit (batched), with many concurrent senders.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_chat_ingest [--senders 200] [--messages 20] [--synchronous FULL]
+
+Uses a throwaway SQLite database. --synchronous sets SQLITE_SYNCHRONOUS,
+i.e. how much each commit costs (FULL fsyncs every commit).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench_chat_ingest_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+if "--synchronous" in sys.argv:
+    # Must be set before the engines are built
+    os.environ["SQLITE_SYNCHRONOUS"] = sys.argv[sys.argv.index("--synchronous") + 1]
+
+from app.database.session import Base, engine  # noqa: E402
+from app.utils.chat_writer import ChatWriter, CHAT_WRITER_FLUSH_MS, CHAT_WRITER_MAX_BATCH  # noqa: E402
+
+
+async def run(mode: str, senders: int, messages: int) -> float:
+    writer = ChatWriter(mode, CHAT_WRITER_MAX_BATCH, CHAT_WRITER_FLUSH_MS, max_pending=senders * messages)
+
+    async def sender(patient_id: int):
+        for i in range(messages):
+            stored = await writer.submit(patient_id, "patient", f"message {i}")
+            assert stored.id is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(1000 + s) for s in range(senders)))
+    elapsed = time.perf_counter() - started
+    await writer.stop()
+
+    total = senders * messages
+    stats = writer.stats()
+    print(
+        f"{mode:<8} {total / elapsed:>10,.0f} msg/s  {elapsed:6.2f} s  "
+        f"{stats['batches']:>6} commits  avg batch {stats['avg_batch']}"
+    )
+    return elapsed
+
+
+async def main_async(args):
+    direct = await run("direct", args.senders, args.messages)
+    batched = await run("batched", args.senders, args.messages)
+    print(f"speedup  {direct / batched:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--senders", type=int, default=200, help="concurrent senders")
+    parser.add_argument("--messages", type=int, default=20, help="messages per sender")
+    parser.add_argument("--synchronous", default=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"))
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"{args.senders} senders x {args.messages} messages, synchronous={args.synchronous}")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Earliest-available search over a large specialization.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_earliest_available [--doctors 5000] [--bookings 40] [--rounds 50]
+
+Seeds a throwaway SQLite database with --doctors doctors in one
+specialization (a third with their own working hours, the rest on the
+default template) and --bookings live bookings each over the next two
+weeks, then times find_earliest_available with a cold and a warm
+template_index.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_earliest_available_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database.migrate import bootstrap  # noqa: E402
+from app.database.models import Appointment, Doctor, DoctorWorkingHours  # noqa: E402
+from app.database.session import SessionLocal, engine  # noqa: E402
+from app.utils.scheduling import find_earliest_available, template_index, to_hhmm  # noqa: E402
+
+SPECIALIZATION = "CARDIOLOGY"
+WINDOW_DAYS = 14
+
+
+def seed(doctors: int, bookings: int):
+    bootstrap(engine)
+    rng = random.Random(11)
+    today = date.today()
+    with engine.begin() as conn:
+        conn.execute(insert(Doctor), [
+            {
+                "name": f"Doctor {i}",
+                "specialization": SPECIALIZATION,
+                "experience": rng.randint(1, 30),
+                "consultation_fee": rng.randrange(300, 2000, 50),
+            }
+            for i in range(doctors)
+        ])
+        # Doctor ids are 1..doctors in a fresh database
+        conn.execute(insert(DoctorWorkingHours), [
+            {"doctor_id": doctor_id, "weekday": weekday, "start_time": "08:00", "end_time": "14:00", "slot_minutes": 20}
+            for doctor_id in range(1, doctors + 1, 3)
+            for weekday in range(6)
+        ])
+
+        rows = []
+        for doctor_id in range(1, doctors + 1):
+            slot_minutes = 20 if doctor_id % 3 == 1 else 30
+            first = 8 * 60 if slot_minutes == 20 else 9 * 60
+            slots = {
+                (today + timedelta(days=rng.randrange(WINDOW_DAYS)),
+                 first + slot_minutes * rng.randrange(12))
+                for _ in range(bookings)
+            }
+            rows.extend(
+                {
+                    "patient_id": None,
+                    "patient_name": "Bench patient",
+                    "doctor_id": doctor_id,
+                    "appointment_date": day,
+                    "appointment_time": to_hhmm(minute),
+                    "status": "scheduled",
+                }
+                for day, minute in slots
+            )
+        for offset in range(0, len(rows), 20000):
+            conn.execute(insert(Appointment), rows[offset:offset + 20000])
+    return len(rows)
+
+
+def time_search(label: str, rounds: int, cold: bool, limit: int):
+    filters = [Doctor.specialization == SPECIALIZATION]
+    start = date.today()
+    latencies = []
+    db = SessionLocal()
+    try:
+        for _ in range(rounds):
+            if cold:
+                template_index._loaded_at.clear()
+            started = time.perf_counter()
+            found = find_earliest_available(db, filters, start, start + timedelta(days=WINDOW_DAYS - 1), limit)
+            latencies.append(time.perf_counter() - started)
+            db.rollback()
+    finally:
+        db.close()
+    latencies.sort()
+    print(
+        f"  {label:<24} p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p99 {latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000:7.1f} ms  hits {len(found)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--doctors", type=int, default=5000)
+    parser.add_argument("--bookings", type=int, default=40, help="live bookings per doctor")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    booked = seed(args.doctors, args.bookings)
+    print(f"seeded {args.doctors:,} doctors, {booked:,} bookings in {time.perf_counter() - started:.1f} s")
+
+    time_search("cold template cache", args.rounds, cold=True, limit=args.limit)
+    time_search("warm template cache", args.rounds, cold=False, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
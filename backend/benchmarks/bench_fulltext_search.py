@@ -0,0 +1,98 @@
+"""
+Full-text search latency over a large chat table.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_fulltext_search [--messages 1000000] [--rounds 200]
+
+Seeds a throwaway SQLite database (through the FTS triggers, as the app
+writes), then times unscoped and per-patient searches for a rare term, a
+common term and prefixes of several lengths via app.database.fulltext.search.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_fulltext_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import fulltext  # noqa: E402
+from app.database.doctorD import ChatMessage  # noqa: E402
+from app.database.migrate import bootstrap  # noqa: E402
+from app.database.session import SessionLocal, engine  # noqa: E402
+
+WORDS = (
+    "pain fever headache cough dose tablet morning evening sleep appetite "
+    "follow up report blood pressure sugar allergy skin itching swelling "
+    "better worse same week day night doctor thanks please check"
+).split()
+RARE = "rash"
+PATIENTS = 5000
+
+
+def seed(count: int):
+    bootstrap(engine)
+    rng = random.Random(7)
+    started = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, count, 20000):
+            rows = []
+            for i in range(offset, min(offset + 20000, count)):
+                words = rng.choices(WORDS, k=rng.randint(5, 20))
+                if i % 1000 == 0:
+                    words.insert(rng.randrange(len(words)), RARE)
+                rows.append({
+                    "patient_id": i % PATIENTS,
+                    "sender": "patient" if i % 2 else "doctor",
+                    "text": " ".join(words),
+                    "timestamp": started + timedelta(seconds=i),
+                })
+            conn.execute(insert(ChatMessage), rows)
+
+
+def time_search(label: str, rounds: int, **kwargs):
+    db = SessionLocal()
+    latencies = []
+    hits = 0
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            hits = len(fulltext.search(db, **kwargs))
+            latencies.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    latencies.sort()
+    print(
+        f"  {label:<28} p50 {statistics.median(latencies) * 1000:6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f} ms  hits {hits}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.messages)
+    print(f"seeded {args.messages:,} messages in {time.perf_counter() - started:.1f} s")
+
+    time_search("rare term", args.rounds, query=RARE, scope="chat")
+    time_search("common term", args.rounds, query="fever", scope="chat")
+    time_search("two terms + prefix", args.rounds, query="blood press", scope="chat")
+    time_search("two terms + 3-char prefix", args.rounds, query="blood pre", scope="chat")
+    time_search("two terms + 2-char prefix", args.rounds, query="blood pr", scope="chat")
+    time_search("common term, one patient", args.rounds, query="fever", scope="chat", patient_id=42)
+    time_search("rare term, one patient", args.rounds, query=RARE, scope="chat", patient_id=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: cached vs uncached access-token verification.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_token_verification [--tokens 50] [--rounds 20000]
+
+Simulates dashboard polling, where a small set of live tokens is verified
+over and over.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from jose import jwt  # noqa: E402
+
+from app.auth import jwt_handler  # noqa: E402
+from app.auth.token_cache import token_cache  # noqa: E402
+
+
+def uncached_verify(token: str):
+    payload = jwt.decode(token, jwt_handler.SECRET_KEY, algorithms=[jwt_handler.ALGORITHM])
+    return payload if payload.get("type") == "access" else None
+
+
+def run(label: str, verify, tokens: list[str], rounds: int):
+    start = time.perf_counter()
+    for i in range(rounds):
+        assert verify(tokens[i % len(tokens)]) is not None
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {rounds / elapsed:>12,.0f} verifications/s  ({elapsed * 1e6 / rounds:.1f} us each)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=50, help="distinct live tokens")
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    tokens = [
+        jwt_handler.create_access_token({"sub": f"user{i}"}) for i in range(args.tokens)
+    ]
+
+    token_cache.clear()
+    uncached = run("uncached", uncached_verify, tokens, args.rounds)
+    cached = run("cached", jwt_handler.verify_token, tokens, args.rounds)
+    print(f"speedup    {uncached / cached:.1f}x")
+    print(token_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Load test for the live chat WebSocket: many concurrent sockets, each
+conversation shared by a doctor and a patient socket.
+
+Start the server first (one worker, since InMemoryBroker is per process):
+
+    uvicorn app.main:app --port 8000
+
+then, from the backend directory (needs the `websockets` package and
+`ulimit -n` above the socket count):
+
+    python -m benchmarks.load_chat_ws [--sockets 2000] [--messages 20] [--url ws://localhost:8000]
+
+Reports connect time, delivery latency (send -> every peer received) and
+any sockets closed by backpressure.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import websockets
+
+
+class Totals:
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.errors = 0
+        self.overflow_closes = 0
+        self.connected = 0
+
+
+async def run_socket(url, patient_id, sender, messages, interval, peers, totals, started):
+    async with websockets.connect(f"{url}/api/chat/ws/{patient_id}", max_queue=None) as ws:
+        totals.connected += 1
+        await started.wait()
+        # Every message in the conversation comes back to each socket
+        expected = messages * peers
+
+        async def send_all():
+            # Spread sockets over the interval instead of all sending at once
+            await asyncio.sleep(random.uniform(0, interval))
+            for i in range(messages):
+                await ws.send(json.dumps({"sender": sender, "text": f"{time.perf_counter()}|{i}"}))
+                await asyncio.sleep(interval)
+
+        async def receive_all():
+            seen = 0
+            while seen < expected:
+                event = json.loads(await ws.recv())
+                if "error" in event:
+                    totals.errors += 1
+                    continue
+                sent_at = float(event["text"].split("|", 1)[0])
+                totals.latencies.append(time.perf_counter() - sent_at)
+                totals.received += 1
+                seen += 1
+
+        try:
+            await asyncio.gather(send_all(), receive_all())
+        except websockets.ConnectionClosed as exc:
+            if exc.rcvd and exc.rcvd.code == 1013:
+                totals.overflow_closes += 1
+            else:
+                totals.errors += 1
+
+
+async def main_async(args):
+    totals = Totals()
+    started = asyncio.Event()
+    conversations = args.sockets // 2
+    tasks = []
+
+    connect_started = time.perf_counter()
+    for conversation in range(conversations):
+        patient_id = args.first_patient_id + conversation
+        for sender in ("doctor", "patient"):
+            tasks.append(asyncio.create_task(run_socket(
+                args.url, patient_id, sender, args.messages, args.interval, 2, totals, started,
+            )))
+    # Let every socket connect (or fail) before traffic starts
+    while time.perf_counter() - connect_started < args.connect_grace:
+        if totals.connected + sum(task.done() for task in tasks) >= len(tasks):
+            break
+        await asyncio.sleep(0.1)
+    connect_elapsed = time.perf_counter() - connect_started
+
+    run_started = time.perf_counter()
+    started.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - run_started
+
+    failed = [r for r in results if isinstance(r, Exception)]
+    latencies = sorted(totals.latencies)
+    print(f"{conversations * 2} sockets, {conversations} conversations, {args.messages} messages per socket")
+    print(f"connect phase   {connect_elapsed:6.1f} s  ({totals.connected} connected)")
+    print(f"delivered       {totals.received:,} in {elapsed:.1f} s ({totals.received / elapsed:,.0f} msg/s)")
+    if latencies:
+        print(
+            f"latency         p50 {statistics.median(latencies) * 1000:.1f} ms  "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms  "
+            f"max {latencies[-1] * 1000:.1f} ms"
+        )
+    print(f"closed by backpressure {totals.overflow_closes}  errors {totals.errors}  failed sockets {len(failed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="ws://localhost:8000")
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20, help="messages sent by each socket")
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between sends")
+    parser.add_argument("--first-patient-id", type=int, default=1_000_000,
+                        help="conversations use ids from here up, away from real data")
+    parser.add_argument("--connect-grace", type=float, default=30.0,
+                        help="seconds to wait for sockets to connect before sending")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
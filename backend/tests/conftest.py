@@ -0,0 +1,41 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite database; the
+environment is set before anything under app/ is imported because the
+engines are built at import time.
+
+    cd backend && python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_db_dir = tempfile.mkdtemp(prefix="telemedicine_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import doctorD, models  # noqa: E402,F401  (register every table)
+from app.database.migrate import bootstrap  # noqa: E402
+from app.database.session import Base, SessionLocal, engine  # noqa: E402
+
+bootstrap(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(delete(table))
+        session.commit()
+        session.close()
@@ -0,0 +1,90 @@
+"""
+The admin appointment listings load patient and doctor names in the
+listing query itself, so the statement count does not grow with the page.
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi import Response
+
+from app.database.models import Appointment, Doctor, User
+from app.routers import appointments
+from app.utils.query_stats import assert_max_queries
+
+DOCTORS = 5
+
+
+def _seed(db, count: int, day: date) -> User:
+    admin = User(username="admin", email="admin@example.com", role="admin", password_hash="x")
+    patients = [
+        User(username=f"patient{i}", email=f"patient{i}@example.com", role="patient", password_hash="x")
+        for i in range(count)
+    ]
+    doctors = [
+        Doctor(name=f"Dr {i}", specialization="General", experience=5, consultation_fee=500)
+        for i in range(DOCTORS)
+    ]
+    db.add_all([admin, *patients, *doctors])
+    db.flush()
+
+    db.add_all(
+        Appointment(
+            patient_id=patient.id,
+            doctor_id=doctors[i % DOCTORS].id,
+            appointment_date=day,
+            appointment_time=f"{9 + i // 6:02d}:{i % 6 * 10:02d}",
+            status="scheduled",
+        )
+        for i, patient in enumerate(patients)
+    )
+    db.commit()
+    # Nothing left in the identity map to satisfy a lazy load for free
+    db.expunge_all()
+    return db.query(User).filter(User.username == "admin").one()
+
+
+LISTINGS = [
+    pytest.param(
+        0,
+        lambda db, admin: appointments.get_today_appointments(db=db, current_user=admin),
+        id="today",
+    ),
+    pytest.param(
+        7,
+        lambda db, admin: appointments.get_upcoming_appointments(
+            response=Response(), cursor=None, limit=100, doctor_id=None,
+            status="scheduled", db=db, current_user=admin,
+        ),
+        id="upcoming",
+    ),
+    pytest.param(
+        -7,
+        lambda db, admin: appointments.get_past_appointments(
+            response=Response(), cursor=None, limit=100, doctor_id=None,
+            status=None, db=db, current_user=admin,
+        ),
+        id="past",
+    ),
+]
+
+
+def _count_queries(db, count: int, days: int, listing) -> int:
+    admin = _seed(db, count, date.today() + timedelta(days=days))
+    with assert_max_queries(2) as captured:
+        rows = listing(db, admin)
+
+    assert len(rows) == count
+    assert all(row.patient_name.startswith("patient") for row in rows)
+    assert all(row.doctor_name.startswith("Dr ") for row in rows)
+    return len(captured)
+
+
+@pytest.mark.parametrize("days, listing", LISTINGS)
+def test_listing_query_count_does_not_grow_with_rows(db, days, listing):
+    single = _count_queries(db, 1, days, listing)
+    db.query(Appointment).delete()
+    db.query(User).delete()
+    db.query(Doctor).delete()
+    db.commit()
+
+    assert _count_queries(db, 50, days, listing) == single
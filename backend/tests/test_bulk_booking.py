@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from app.database.models import Doctor, User
+from app.schemas.appointment import BulkAppointmentItem
+from app.utils import scheduling
+from app.utils.bulk_booking import book_appointments
+
+
+def test_past_days_and_started_slots_are_rejected(db, monkeypatch):
+    today = date(2030, 1, 2)  # a Wednesday
+    monkeypatch.setattr(scheduling, "_now", lambda: (today, 12 * 60 + 10))
+    patient = User(username="jack", email="jack@example.com", role="user", password_hash="x")
+    doctor = Doctor(name="Dr A", specialization="GENERAL", experience=5, consultation_fee=500)
+    db.add_all([patient, doctor])
+    db.commit()
+
+    items = [
+        BulkAppointmentItem(doctor_id=doctor.id, appointment_date=today - timedelta(days=1), appointment_time="14:00"),
+        BulkAppointmentItem(doctor_id=doctor.id, appointment_date=today, appointment_time="12:00"),
+        BulkAppointmentItem(doctor_id=doctor.id, appointment_date=today, appointment_time="12:30"),
+    ]
+    report = book_appointments(db, items, "per_item", patient)
+
+    assert [(r["status"], r.get("error")) for r in report["results"]] == [
+        ("error", "Requested time is in the past"),
+        ("error", "Requested time is in the past"),
+        ("created", None),
+    ]
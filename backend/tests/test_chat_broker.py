@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.utils.chat_broker import ChatBroker, InMemoryBroker
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_publish_fans_out_to_every_subscriber_of_the_topic():
+    async def scenario():
+        broker = InMemoryBroker(queue_size=4, overflow_policy="disconnect")
+        first = await broker.subscribe("chat:1")
+        second = await broker.subscribe("chat:1")
+        other = await broker.subscribe("chat:2")
+
+        delivered = await broker.publish("chat:1", {"text": "hi"})
+
+        assert delivered == 2
+        assert await first.get() == {"text": "hi"}
+        assert await second.get() == {"text": "hi"}
+        assert other.queue.empty()
+    _run(scenario())
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    async def scenario():
+        broker = InMemoryBroker(queue_size=2, overflow_policy="drop_oldest")
+        subscription = await broker.subscribe("chat:1")
+        for n in range(3):
+            await broker.publish("chat:1", {"n": n})
+
+        assert [await subscription.get(), await subscription.get()] == [{"n": 1}, {"n": 2}]
+        assert subscription.dropped == 1
+        assert broker.stats()["dropped"] == 1
+    _run(scenario())
+
+
+def test_disconnect_policy_stops_delivery_and_fails_get():
+    async def scenario():
+        broker = InMemoryBroker(queue_size=1, overflow_policy="disconnect")
+        slow = await broker.subscribe("chat:1")
+        await broker.publish("chat:1", {"n": 0})
+
+        assert await broker.publish("chat:1", {"n": 1}) == 0
+        assert await broker.publish("chat:1", {"n": 2}) == 0
+        assert broker.stats()["disconnected"] == 1
+        # Queued messages are not handed out once the subscriber overflowed
+        with pytest.raises(ConnectionResetError):
+            await slow.get()
+    _run(scenario())
+
+
+def test_a_waiting_get_fails_when_the_subscriber_overflows():
+    async def scenario():
+        broker = InMemoryBroker(queue_size=1, overflow_policy="disconnect")
+        subscription = await broker.subscribe("chat:1")
+        waiting = asyncio.ensure_future(subscription.get())
+        await asyncio.sleep(0)
+
+        subscription.overflowed.set()
+
+        with pytest.raises(ConnectionResetError):
+            await waiting
+    _run(scenario())
+
+
+def test_unsubscribe_removes_the_subscriber_and_its_empty_topic():
+    async def scenario():
+        broker = InMemoryBroker(queue_size=4, overflow_policy="disconnect")
+        first = await broker.subscribe("chat:1")
+        second = await broker.subscribe("chat:1")
+
+        await broker.unsubscribe(first)
+        assert await broker.publish("chat:1", {"text": "hi"}) == 1
+        assert first.queue.empty()
+
+        await broker.unsubscribe(second)
+        await broker.unsubscribe(second)  # idempotent
+        assert broker.stats()["topics"] == 0
+        assert await broker.publish("chat:1", {"text": "hi"}) == 0
+    _run(scenario())
+
+
+def test_broker_interface_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        ChatBroker()
+
+    with pytest.raises(ValueError):
+        InMemoryBroker(queue_size=1, overflow_policy="block")
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.database.async_session import AsyncSessionLocal, async_engine
+from app.database.doctorD import ChatMessage
+from app.utils.async_telemedicine_utils import get_chat_history
+
+PATIENT_ID = 7
+
+
+def _history(**cursor):
+    async def fetch():
+        try:
+            async with AsyncSessionLocal() as session:
+                messages, has_more = await get_chat_history(session, PATIENT_ID, 2, **cursor)
+                return [m.text for m in messages], has_more
+        finally:
+            # Pooled connections belong to this call's event loop
+            await async_engine.dispose()
+    return asyncio.run(fetch())
+
+
+def test_delta_includes_a_message_committed_after_a_later_timestamp(db):
+    now = datetime(2030, 1, 1, 12, 0)
+    first = ChatMessage(patient_id=PATIENT_ID, sender="patient", text="first", timestamp=now)
+    db.add(first)
+    db.commit()
+    # Submitted earlier than "first" but stored after it, as a batched write can be
+    db.add(ChatMessage(patient_id=PATIENT_ID, sender="doctor", text="late", timestamp=now - timedelta(seconds=1)))
+    db.commit()
+
+    assert _history(after_id=first.id) == (["late"], False)
+
+
+def test_pages_walk_the_conversation_in_id_order(db):
+    messages = [ChatMessage(patient_id=PATIENT_ID, sender="patient", text=f"m{i}") for i in range(5)]
+    db.add_all(messages)
+    db.add(ChatMessage(patient_id=PATIENT_ID + 1, sender="patient", text="other"))
+    db.commit()
+
+    assert _history() == (["m3", "m4"], True)
+    assert _history(before_id=messages[3].id) == (["m1", "m2"], True)
+    assert _history(before_id=messages[1].id) == (["m0"], False)
+    assert _history(after_id=messages[0].id) == (["m1", "m2"], True)
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.database.async_session import async_engine
+from app.database.doctorD import ChatMessage
+from app.utils.chat_writer import ChatWriter
+
+
+def _submit_all(writer, messages):
+    async def submit():
+        try:
+            results = await asyncio.gather(
+                *(writer.submit(*message) for message in messages), return_exceptions=True
+            )
+            await writer.stop()
+            return results
+        finally:
+            # Pooled connections belong to this call's event loop
+            await async_engine.dispose()
+    return asyncio.run(submit())
+
+
+def test_batched_messages_get_their_own_ids(db):
+    # Repeated texts: rows are matched back by content, duplicates included
+    messages = [(i % 3, "patient", f"text {i % 4}") for i in range(40)]
+    stored = _submit_all(ChatWriter("batched", 16, 5, 100), messages)
+
+    assert len({message.id for message in stored}) == len(messages)
+    for message in stored:
+        row = db.get(ChatMessage, message.id)
+        assert (row.patient_id, row.sender, row.text) == (message.patient_id, message.sender, message.text)
+
+
+def test_a_bad_row_fails_only_its_sender(db):
+    good, bad = _submit_all(ChatWriter("batched", 16, 5, 100), [(1, "doctor", "fine"), (1, "doctor", object())])
+
+    assert db.get(ChatMessage, good.id).text == "fine"
+    assert isinstance(bad, Exception)
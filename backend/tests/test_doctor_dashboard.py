@@ -0,0 +1,70 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+
+from starlette.requests import Request
+
+from app.database.doctorD import Request as PatientRequest
+from app.database.models import Appointment, Doctor, User
+from app.routers import doctorD
+from app.routers.doctorD import get_doctor_dashboard
+
+
+def _get(db, user, headers=()):
+    request = Request({"type": "http", "method": "GET", "path": "/api/doctor/dashboard", "headers": list(headers)})
+    return get_doctor_dashboard(request, db=db, current_user=user)
+
+
+def _dashboard(db, user):
+    return json.loads(_get(db, user).body)
+
+
+def test_live_timer_starts_when_the_consultation_does(db):
+    user = User(username="doc", email="doc@example.com", role="user", password_hash="x")
+    doctor = Doctor(name="Dr A", specialization="General", experience=5, consultation_fee=500)
+    db.add_all([user, doctor])
+    db.flush()
+    live = Appointment(doctor_id=doctor.id, patient_name="Walk-in", appointment_date=date.today(), appointment_time="09:00")
+    db.add_all([
+        live,
+        Appointment(doctor_id=doctor.id, patient_id=user.id, appointment_date=date.today(), appointment_time="09:30"),
+        Appointment(doctor_id=doctor.id, patient_id=user.id, appointment_date=date.today(), appointment_time="10:00"),
+    ])
+    db.commit()
+    assert live.started_at is None
+
+    before = datetime.now(timezone.utc)
+    live.status = "in_progress"
+    db.commit()
+
+    payload = _dashboard(db, user)
+    timer_start = datetime.fromisoformat(payload["live_consultation"]["timer_start"])
+    assert timer_start.utcoffset() == timedelta(0)
+    assert before - timedelta(seconds=1) <= timer_start <= datetime.now(timezone.utc)
+    assert payload["stats"] == {"requests_count": 0, "appointments_today": 3, "patients_today": 2}
+
+    # Later edits to the row do not restart the timer
+    live.reason = "Follow-up"
+    db.commit()
+    assert _dashboard(db, user)["live_consultation"]["timer_start"] == payload["live_consultation"]["timer_start"]
+
+
+def test_pending_requests_are_capped_but_fully_counted(db, monkeypatch):
+    monkeypatch.setattr(doctorD, "DASHBOARD_PENDING_REQUESTS", 2)
+    user = User(username="doc", email="doc@example.com", role="user", password_hash="x")
+    db.add(user)
+    db.add_all(PatientRequest(patient_name=f"P{i}", issue="rash", time="10:00 AM", status="pending") for i in range(3))
+    db.add(PatientRequest(patient_name="Done", issue="rash", time="10:00 AM", status="approved"))
+    db.commit()
+
+    payload = _dashboard(db, user)
+
+    assert [req["patient_name"] for req in payload["pending_requests"]] == ["P0", "P1"]
+    assert payload["stats"]["requests_count"] == 3
+
+
+def test_if_none_match_star_gets_a_304(db):
+    user = User(username="doc", email="doc@example.com", role="user", password_hash="x")
+    db.add(user)
+    db.commit()
+
+    assert _get(db, user, [(b"if-none-match", b"*")]).status_code == 304
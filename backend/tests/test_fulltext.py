@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+
+from app.database import fulltext
+from app.database.doctorD import ChatMessage, Request
+from app.database.models import User
+from app.routers.doctorD import search_records
+
+
+def _chat(db, *texts, patient_id=1):
+    db.add_all(ChatMessage(patient_id=patient_id, sender="patient", text=text) for text in texts)
+    db.commit()
+
+
+def test_snippets_escape_stored_markup(db):
+    _chat(db, "<img src=x onerror=alert(1)> fever since monday")
+
+    [hit] = fulltext.search(db, "fever", scope="chat")
+
+    assert "<img" not in hit["snippet"]
+    assert "&lt;img src=x onerror=alert(1)&gt;" in hit["snippet"]
+    assert "<mark>fever</mark>" in hit["snippet"]
+
+
+def test_rare_terms_are_ranked(db):
+    _chat(db, "fever", "fever and more fever today")
+
+    hits = fulltext.search(db, "fever", scope="chat")
+
+    assert all(hit["rank"] is not None for hit in hits)
+    assert hits == sorted(hits, key=lambda hit: hit["rank"])
+
+
+def test_common_terms_come_newest_first_unranked(db, monkeypatch):
+    monkeypatch.setattr(fulltext, "FULLTEXT_RANK_WINDOW", 2)
+    _chat(db, "fever one", "fever two", "fever three")
+
+    hits = fulltext.search(db, "fever", scope="chat", limit=2)
+
+    assert [hit["rank"] for hit in hits] == [None, None]
+    assert [hit["snippet"] for hit in hits] == ["<mark>fever</mark> three", "<mark>fever</mark> two"]
+
+
+def test_last_word_falls_back_to_a_prefix(db):
+    _chat(db, "blood pressure is high")
+
+    assert len(fulltext.search(db, "blood press", scope="chat")) == 1
+
+
+def test_request_scope_matches_the_patient_name_exactly(db):
+    db.add_all([
+        Request(patient_name="Anna Smith", issue="rash on arm", status="pending"),
+        Request(patient_name="Anna Smiths", issue="rash on leg", status="pending"),
+        Request(patient_name="anna smith", issue="rash on neck", status="pending"),
+    ])
+    db.commit()
+
+    hits = fulltext.search(db, "rash", scope="requests", patient_name="Anna Smith")
+
+    assert [hit["patient_name"] for hit in hits] == ["Anna Smith"]
+
+
+def test_search_is_admin_only(db):
+    user = User(username="lee", email="lee@example.com", role="user", password_hash="x")
+
+    with pytest.raises(HTTPException) as exc_info:
+        search_records(q="rash", scope="all", patient_id=None, patient_name=None, limit=20, db=db, current_user=user)
+
+    assert exc_info.value.status_code == 403
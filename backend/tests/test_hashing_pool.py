@@ -0,0 +1,31 @@
+from concurrent.futures import Future
+
+import pytest
+
+from app.auth.hashing_pool import PasswordHasher
+
+
+class _BrokenExecutor:
+    """Accepts the first job, then fails like a shut-down pool."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted > 1:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        future = Future()
+        future.set_result(("hash", 0.0, 0.0))
+        return future
+
+
+def test_hash_many_releases_the_slot_when_submit_fails():
+    hasher = PasswordHasher(workers=2, max_pending=2, retry_after=1)
+    hasher._executor = _BrokenExecutor()
+
+    with pytest.raises(RuntimeError):
+        hasher.hash_many(["a", "b"])
+
+    assert hasher.pending == 0
+    assert hasher._slots.acquire(blocking=False) and hasher._slots.acquire(blocking=False)
@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.appointments import _KEYSET_COLUMNS
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips_typed_values():
+    values = [date(2024, 1, 1), "10:00", 7]
+    assert decode_cursor(encode_cursor(values), _KEYSET_COLUMNS) == values
+
+
+@pytest.mark.parametrize("values", [
+    [123, "10:00", 1],
+    ["not-a-date", "10:00", 1],
+    ["2024-01-01", 10, 1],
+    ["2024-01-01", "10:00", "1"],
+    ["2024-01-01", "10:00", True],
+    ["2024-01-01", "10:00"],
+])
+def test_malformed_cursor_is_a_400(values):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(encode_cursor(values), _KEYSET_COLUMNS)
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "e30"])  # not base64; base64 of "{}"
+def test_undecodable_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, _KEYSET_COLUMNS)
+    assert exc_info.value.status_code == 400
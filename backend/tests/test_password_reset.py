@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from app.auth import routes
+from app.auth.reset_tokens import find_reset_token, issue_reset_token
+from app.database.models import PasswordResetToken, User
+from app.database.session import SessionLocal
+
+
+def test_a_token_resets_the_password_only_once(db, monkeypatch):
+    monkeypatch.setattr(routes.password_hasher, "hash_password", lambda password: f"hashed:{password}")
+    user = User(username="dave", email="dave@example.com", role="user", password_hash="old")
+    db.add(user)
+    db.commit()
+    token = issue_reset_token(db, user.id)
+
+    # A second request looked the token up before the first one consumed it
+    racer = SessionLocal()
+    try:
+        stale = find_reset_token(racer, token)
+        assert stale is not None
+        monkeypatch.setattr(routes, "find_reset_token", lambda _db, _token: stale)
+
+        assert routes.reset_password(token, "first", db=db) == {"message": "Password reset successful"}
+        with pytest.raises(HTTPException) as rejected:
+            routes.reset_password(token, "second", db=racer)
+        assert rejected.value.status_code == 400
+    finally:
+        racer.close()
+
+    db.expire_all()
+    assert db.get(User, user.id).password_hash == "hashed:first"
+    assert db.query(PasswordResetToken).count() == 0
@@ -0,0 +1,53 @@
+from app.auth.jwt_handler import load_principal
+from app.auth.principal_cache import principal_cache
+from app.database.models import User
+from app.database.session import SessionLocal
+
+
+def test_entry_is_dropped_when_the_write_commits_not_when_it_flushes(db):
+    principal_cache.clear()
+    db.add(User(username="alice", email="alice@example.com", role="user", password_hash="x"))
+    db.commit()
+
+    writer = SessionLocal()
+    try:
+        user = writer.query(User).filter(User.username == "alice").one()
+        user.role = "admin"
+        writer.flush()
+
+        # Another request loads the committed (old) row while the write is open
+        reader = SessionLocal()
+        try:
+            assert load_principal(reader, "alice").role == "user"
+        finally:
+            reader.close()
+
+        writer.commit()
+    finally:
+        writer.close()
+
+    assert principal_cache.get("alice") is None
+    assert load_principal(db, "alice").role == "admin"
+
+
+def test_snapshot_loaded_before_an_invalidation_is_not_cached(db):
+    principal_cache.clear()
+    generation = principal_cache.generation()
+    principal_cache.invalidate("bob")
+
+    principal_cache.put("bob", User(username="bob"), generation)
+
+    assert principal_cache.get("bob") is None
+
+
+def test_rolled_back_write_leaves_the_entry(db):
+    principal_cache.clear()
+    db.add(User(username="carol", email="carol@example.com", role="user", password_hash="x"))
+    db.commit()
+    load_principal(db, "carol")
+
+    db.query(User).filter(User.username == "carol").one().role = "admin"
+    db.flush()
+    db.rollback()
+
+    assert principal_cache.get("carol") is not None
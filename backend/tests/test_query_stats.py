@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import text
+
+from app.utils.query_stats import assert_max_queries
+
+
+def test_assert_max_queries_counts_statements(db):
+    with assert_max_queries(2) as captured:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+
+    assert len(captured) == 2
+
+
+def test_assert_max_queries_lists_statements_over_the_limit(db):
+    with pytest.raises(AssertionError) as exc_info:
+        with assert_max_queries(1):
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+
+    message = str(exc_info.value)
+    assert "Expected at most 1 queries, got 2" in message
+    assert "SELECT 2" in message
@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.database.models import Appointment, Doctor, User
+from app.routers.doctorD import export_appointments
+from app.utils.schedule_export import appointment_filters, export_etag
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/api/doctor/appointments/export.csv", "headers": []})
+
+
+def test_an_edit_within_the_same_second_changes_the_etag(db):
+    doctor = Doctor(name="Dr A", specialization="General", experience=5, consultation_fee=500)
+    db.add(doctor)
+    db.flush()
+    appointment = Appointment(doctor_id=doctor.id, patient_name="Walk-in", appointment_date=date(2030, 1, 2), appointment_time="09:00")
+    db.add(appointment)
+    db.commit()
+    filters = appointment_filters(doctor.id)
+    before = export_etag(db, "csv", filters, "test")
+
+    # updated_at only ticks once a second on SQLite; keep it to rule the clock out
+    db.query(Appointment).filter(Appointment.id == appointment.id).update(
+        {Appointment.status: "completed", Appointment.updated_at: appointment.updated_at},
+        synchronize_session=False,
+    )
+    db.commit()
+
+    assert export_etag(db, "csv", filters, "test") != before
+
+
+def test_doctor_export_is_admin_only(db):
+    user = User(username="kim", email="kim@example.com", role="user", password_hash="x")
+
+    with pytest.raises(HTTPException) as exc_info:
+        export_appointments("csv", _request(), current_user=user)
+
+    assert exc_info.value.status_code == 403
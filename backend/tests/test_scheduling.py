@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.database.models import Appointment, Doctor, User
+from app.routers.appointments import update_appointment
+from app.routers.routers import doctors_availability
+from app.schemas.appointment import AppointmentUpdate
+from app.utils import scheduling
+from app.utils.scheduling import find_earliest_available, get_availability
+
+
+@pytest.fixture
+def doctor(db):
+    doctor = Doctor(name="Dr A", specialization="GENERAL", experience=5, consultation_fee=500)
+    db.add(doctor)
+    db.commit()
+    return doctor
+
+
+@pytest.fixture
+def weekday_noon(monkeypatch):
+    """Pin "now" to 12:10 on a Wednesday."""
+    today = date(2030, 1, 2)
+    monkeypatch.setattr(scheduling, "_now", lambda: (today, 12 * 60 + 10))
+    return today
+
+
+def test_availability_skips_past_days_and_started_slots(db, doctor, weekday_noon):
+    days = get_availability(db, [doctor.id], weekday_noon - timedelta(days=2), weekday_noon)[doctor.id]
+
+    assert [day["date"] for day in days] == [weekday_noon]
+    assert days[0]["slots"][0] == "12:30"
+
+
+def test_availability_rejects_unknown_doctors(db, doctor, weekday_noon):
+    with pytest.raises(HTTPException) as exc_info:
+        doctors_availability(doctor_ids=[doctor.id, doctor.id + 1], from_date=weekday_noon, to_date=weekday_noon, db=db)
+
+    assert exc_info.value.status_code == 404
+    assert str(doctor.id + 1) in exc_info.value.detail
+
+
+def test_earliest_available_ignores_a_past_from_date(db, doctor, weekday_noon):
+    found = find_earliest_available(
+        db, [Doctor.specialization == "GENERAL"], weekday_noon - timedelta(days=7), weekday_noon, 5,
+    )
+
+    assert [(hit["date"], hit["time"]) for hit in found] == [(weekday_noon, "12:30")]
+
+
+def test_reviving_a_cancelled_booking_claims_its_slot_again(db, doctor, weekday_noon):
+    patient = User(username="gail", email="gail@example.com", role="user", password_hash="x")
+    other = User(username="hank", email="hank@example.com", role="user", password_hash="x")
+    db.add_all([patient, other])
+    db.flush()
+    tomorrow = weekday_noon + timedelta(days=1)
+    cancelled = Appointment(
+        patient_id=patient.id, doctor_id=doctor.id, appointment_date=tomorrow,
+        appointment_time="14:00", status="cancelled",
+    )
+    db.add_all([
+        cancelled,
+        Appointment(patient_id=other.id, doctor_id=doctor.id, appointment_date=tomorrow, appointment_time="14:00"),
+    ])
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        update_appointment(cancelled.id, AppointmentUpdate(status="scheduled"), db=db, current_user=patient)
+    assert exc_info.value.status_code == 409
+
+    moved = update_appointment(
+        cancelled.id, AppointmentUpdate(status="scheduled", appointment_time="14:30"), db=db, current_user=patient,
+    )
+    assert (moved.status, moved.appointment_time) == ("scheduled", "14:30")
+
+
+def test_patients_cannot_set_clinic_statuses_or_book_the_past(db, doctor, weekday_noon):
+    patient = User(username="ivy", email="ivy@example.com", role="user", password_hash="x")
+    db.add(patient)
+    db.flush()
+    appointment = Appointment(
+        patient_id=patient.id, doctor_id=doctor.id, appointment_date=weekday_noon,
+        appointment_time="12:00", status="cancelled",
+    )
+    db.add(appointment)
+    db.commit()
+
+    for update in (AppointmentUpdate(status="completed"), AppointmentUpdate(status="scheduled")):
+        with pytest.raises(HTTPException) as exc_info:
+            update_appointment(appointment.id, update, db=db, current_user=patient)
+        assert exc_info.value.status_code == 400
+
+
+def test_earliest_available_ranks_across_search_batches(db, doctor, weekday_noon, monkeypatch):
+    monkeypatch.setattr(scheduling, "EARLIEST_SEARCH_BATCH", 1)
+    pricier = Doctor(name="Dr B", specialization="GENERAL", experience=5, consultation_fee=900)
+    db.add(pricier)
+    db.flush()
+    # The cheaper doctor's first slot is taken, so the pricier one wins it
+    db.add(Appointment(patient_name="Walk-in", doctor_id=doctor.id, appointment_date=weekday_noon, appointment_time="12:30"))
+    db.commit()
+
+    found = find_earliest_available(db, [Doctor.specialization == "GENERAL"], weekday_noon, weekday_noon, 2)
+
+    assert [(hit["doctor"].id, hit["time"]) for hit in found] == [(pricier.id, "12:30"), (doctor.id, "13:00")]
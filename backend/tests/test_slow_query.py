@@ -0,0 +1,46 @@
+import logging
+
+from sqlalchemy import text
+
+from app.database.models import User
+from app.utils import query_stats, slow_query  # noqa: F401  (query_stats installs the listener)
+
+
+def _explain_every_query(monkeypatch):
+    monkeypatch.setattr(slow_query, "SLOW_QUERY_THRESHOLD_MS", 0)
+    monkeypatch.setattr(slow_query, "statement_timings", slow_query.StatementTimings(100))
+
+
+def test_plan_is_captured_without_disturbing_the_open_transaction(db, monkeypatch, caplog):
+    _explain_every_query(monkeypatch)
+    db.add(User(username="erin", email="erin@example.com", role="user", password_hash="x"))
+    db.flush()
+
+    with caplog.at_level(logging.WARNING, logger="my_app.sql"):
+        assert db.execute(text("SELECT count(*) FROM users WHERE username = 'erin'")).scalar() == 1
+
+    assert any("plan:" in record.getMessage() for record in caplog.records)
+    db.rollback()
+    assert db.query(User).count() == 0
+
+
+def test_failed_explain_is_logged_and_the_transaction_survives(db, monkeypatch, caplog):
+    _explain_every_query(monkeypatch)
+    monkeypatch.setitem(slow_query.EXPLAIN_PREFIXES, "sqlite", "NOT A STATEMENT ")
+    db.add(User(username="finn", email="finn@example.com", role="user", password_hash="x"))
+    db.flush()
+
+    with caplog.at_level(logging.WARNING, logger="my_app.sql"):
+        db.execute(text("SELECT 1"))
+
+    assert any("EXPLAIN failed" in record.getMessage() for record in caplog.records)
+    db.commit()
+    assert db.query(User).filter(User.username == "finn").count() == 1
+
+
+def test_explain_bookkeeping_is_bounded():
+    timings = slow_query.StatementTimings(2)
+
+    assert timings.should_explain("a") and timings.should_explain("b")
+    assert not timings.should_explain("c")
+    assert len(timings._last_explained) == 2
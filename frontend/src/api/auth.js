@@ -23,6 +23,8 @@ export function useAuth() {
     });
     const data = await res.json();
     setAccessToken(data.access_token);
+    // Refresh tokens are single-use; keep the rotated one
+    setRefreshToken(data.refresh_token);
   }
 
   return { login, refresh, accessToken };
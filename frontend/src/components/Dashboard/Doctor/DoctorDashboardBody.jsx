@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { useAuth } from "../../../context/AuthContext";
 import { fetchNotifications } from "../../../api/notifications";
@@ -56,6 +56,7 @@ export default function DoctorDashboardBody() {
    
   // NEW: Live Session State
   const [liveSession, setLiveSession] = useState(null);
+  const [dashboardStats, setDashboardStats] = useState(null);
 
   // Session & Chat State
   const [sessionTimer, setSessionTimer] = useState(0);
@@ -98,23 +99,32 @@ export default function DoctorDashboardBody() {
       .catch(console.error);
   }, [accessToken]);
 
-  // 1. Session Timer
+  // 1. Session Timer: time since the live consultation started (timer_start is UTC)
   useEffect(() => {
-    const timer = setInterval(() => {
-      setSessionTimer((prev) => prev + 1);
-    }, 1000);
+    const startedAt = liveSession && liveSession.timer_start ? Date.parse(liveSession.timer_start) : NaN;
+    if (Number.isNaN(startedAt)) {
+      setSessionTimer(0);
+      return;
+    }
+    const tick = () => setSessionTimer(Math.max(0, Math.floor((Date.now() - startedAt) / 1000)));
+    tick();
+    const timer = setInterval(tick, 1000);
     return () => clearInterval(timer);
-  }, []);
+  }, [liveSession]);
 
-  // 2. Fetch Dashboard Data (Schedule, Requests, Live Session)
+  // 2. Fetch Dashboard Data (Schedule, Requests, Live Session) in one request;
+  // the browser revalidates with the ETag, so unchanged loads are a 304
   useEffect(() => {
+    if (!accessToken) return;
     const fetchDashboardData = async () => {
       try {
-        // A. Fetch Schedule
-        const scheduleRes = await axios.get(`${API_BASE_URL}/api/appointments`);
-        const rawSchedule = Array.isArray(scheduleRes.data) ? scheduleRes.data : [];
-        
-        const formattedSchedule = rawSchedule.map(appt => ({
+        const res = await axios.get(`${API_BASE_URL}/api/doctor/dashboard`, {
+          headers: { Authorization: `Bearer ${accessToken}` },
+        });
+        const { schedule = [], pending_requests = [], live_consultation, stats } = res.data || {};
+
+        // A. Schedule
+        const formattedSchedule = schedule.map(appt => ({
           id: appt.id,
           patient: appt.patient_name || "Unknown",
           type: appt.type || "Consultation",
@@ -124,26 +134,21 @@ export default function DoctorDashboardBody() {
         setTodaySchedule(formattedSchedule);
         setIsLoadingSchedule(false);
 
-        // B. Fetch Requests
-        const requestsRes = await axios.get(`${API_BASE_URL}/api/appointments/requests?status=pending`);
-        const rawRequests = Array.isArray(requestsRes.data) ? requestsRes.data : [];
-
-        const formattedRequests = rawRequests.map(req => ({
+        // B. Requests
+        const formattedRequests = pending_requests.map(req => ({
             id: req.id,
             patient: req.patient_name || "Unknown",
-            reason: req.reason || "Checkup",
-            requestedTime: req.requested_time || "TBD",
-            status: req.status
+            reason: req.issue || "Checkup",
+            requestedTime: req.time || "TBD",
+            status: "pending"
         }));
         setRequests(formattedRequests);
 
-        // C. Fetch Live Session (NEW INTEGRATION)
-        const liveRes = await axios.get(`${API_BASE_URL}/api/consultation/live`);
-        if (liveRes.data && liveRes.data.active) {
-            setLiveSession(liveRes.data);
-        } else {
-            setLiveSession(null);
-        }
+        // C. Live Session
+        setLiveSession(live_consultation && live_consultation.active ? live_consultation : null);
+
+        // D. Stats
+        setDashboardStats(stats || null);
 
       } catch (error) {
         console.error("Error fetching dashboard data:", error);
@@ -152,7 +157,7 @@ export default function DoctorDashboardBody() {
     };
 
     fetchDashboardData();
-  }, [API_BASE_URL]);
+  }, [API_BASE_URL, accessToken]);
 
   // 3. Fetch Chat History
   useEffect(() => {
@@ -160,7 +165,11 @@ export default function DoctorDashboardBody() {
         try {
             const res = await axios.get(`${API_BASE_URL}/api/chat/history/${ACTIVE_PATIENT_ID}`);
             if (Array.isArray(res.data)) {
-                setMessages(res.data);
+                // Keep anything the socket delivered while this was in flight
+                setMessages(prev => {
+                    const fetched = new Set(res.data.map(m => m.id));
+                    return [...res.data, ...prev.filter(m => !fetched.has(m.id))];
+                });
             }
         } catch (error) {
             console.error("Error fetching chat history", error);
@@ -169,6 +178,86 @@ export default function DoctorDashboardBody() {
     fetchChatHistory();
   }, [API_BASE_URL]);
 
+  // 4. Live chat socket while the drawer is open
+  const chatSocketRef = useRef(null);
+  const messagesRef = useRef(messages);
+  useEffect(() => {
+    messagesRef.current = messages;
+  }, [messages]);
+
+  useEffect(() => {
+    if (!showChat) return;
+    let closedByUs = false;
+    const wsUrl = `${API_BASE_URL.replace(/^http/, "ws")}/api/chat/ws/${ACTIVE_PATIENT_ID}`;
+
+    let retryTimer = null;
+    let attempt = 0;
+
+    // Stored rows in id order; optimistic copies (local id, no timestamp) stay last
+    const appendNew = (incoming) => setMessages(prev => {
+      const known = new Set(prev.map(m => m.id));
+      const fresh = incoming.filter(m => !known.has(m.id));
+      if (fresh.length === 0) return prev;
+      return [...prev, ...fresh].sort((a, b) =>
+        (!a.timestamp) - (!b.timestamp) || (a.timestamp && b.timestamp ? a.id - b.id : 0)
+      );
+    });
+
+    // Pages of history after the newest stored message until X-Has-More says we are current
+    const catchUp = async () => {
+      const lastId = messagesRef.current.reduce(
+        (max, m) => (m.timestamp && m.id > max ? m.id : max), 0
+      );
+      let afterId = lastId || null;
+      let hasMore = true;
+      while (hasMore && !closedByUs) {
+        const params = afterId !== null ? { after_id: afterId } : {};
+        const res = await axios.get(`${API_BASE_URL}/api/chat/history/${ACTIVE_PATIENT_ID}`, { params });
+        const page = Array.isArray(res.data) ? res.data : [];
+        appendNew(page);
+        if (page.length === 0) break;
+        afterId = page[page.length - 1].id;
+        hasMore = res.headers["x-has-more"] === "true";
+      }
+    };
+
+    const connect = () => {
+      retryTimer = null;
+      const socket = new WebSocket(wsUrl);
+      // Anything sent between the last fetch (or socket) and now comes from history
+      socket.onopen = () => {
+        attempt = 0;
+        catchUp().catch(console.error);
+      };
+      socket.onmessage = (event) => {
+        const msg = JSON.parse(event.data);
+        if (msg.error) {
+          console.error("Chat error:", msg.error);
+          return;
+        }
+        appendNew([msg]);
+      };
+      socket.onclose = () => {
+        if (chatSocketRef.current === socket) chatSocketRef.current = null;
+        if (closedByUs) return;
+        // Overflow (1013), server restart or network drop: back off, then reconnect
+        const delay = Math.min(30000, 1000 * 2 ** attempt);
+        attempt += 1;
+        retryTimer = setTimeout(connect, delay);
+      };
+      chatSocketRef.current = socket;
+    };
+
+    connect();
+    return () => {
+      closedByUs = true;
+      if (retryTimer) clearTimeout(retryTimer);
+      const socket = chatSocketRef.current;
+      chatSocketRef.current = null;
+      if (socket) socket.close();
+    };
+  }, [API_BASE_URL, showChat]);
+
   const formatTime = (seconds) => {
     const mins = Math.floor(seconds / 60);
     const secs = seconds % 60;
@@ -205,6 +294,14 @@ export default function DoctorDashboardBody() {
   const handleSendMessage = async () => {
     if (!chatInput.trim()) return;
 
+    // The socket echoes the stored message back, so no optimistic copy
+    const socket = chatSocketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ sender: "doctor", text: chatInput }));
+      setChatInput("");
+      return;
+    }
+
     // Optimistic Update
     const tempMsg = { id: Date.now(), sender: 'doctor', text: chatInput };
     setMessages(prev => [...prev, tempMsg]);
@@ -458,14 +555,14 @@ export default function DoctorDashboardBody() {
 
               {/* PERFORMANCE */}
               <div className="card p-20">
-                <h4 className="m-0 color-muted uppercase small">Performance</h4>
+                <h4 className="m-0 color-muted uppercase small">Today</h4>
                 <div className="stats-grid mt-15">
                   <div className="text-center">
-                    <h2 className="m-0 color-primary">4.8</h2>
-                    <small>Avg Rating</small>
+                    <h2 className="m-0 color-primary">{dashboardStats ? dashboardStats.appointments_today : "–"}</h2>
+                    <small>Appointments</small>
                   </div>
                   <div className="text-center">
-                    <h2 className="m-0">12</h2>
+                    <h2 className="m-0">{dashboardStats ? dashboardStats.patients_today : "–"}</h2>
                     <small>Patients</small>
                   </div>
                 </div>